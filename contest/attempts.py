@@ -0,0 +1,62 @@
+"""
+Per-user, per-problem attempt state.
+
+``ProblemAttemptState`` keeps the counts and last-submission details that the
+submission limit check and the attempt summary need, so each of them is a
+single unique-key read instead of several scans of the user's submissions.
+A row is bumped when a submission is created and again when its verdict is
+written.
+"""
+from django.db import transaction
+from django.db.models import F, Value
+from django.db.models.functions import Greatest
+
+from .models import ProblemAttemptState
+
+# Statuses that do not count towards a problem's submission limit
+UNCOUNTED_STATUSES = ['In Queue', 'Processing', 'Internal Error']
+
+
+def get_attempt_state(user, problem):
+    """The user's attempt state for the problem, or None before their first submission"""
+    return ProblemAttemptState.objects.filter(user=user, problem=problem).first()
+
+
+def record_attempt(submission):
+    """Count a newly created submission as the user's latest attempt"""
+    with transaction.atomic():
+        state, _ = ProblemAttemptState.objects.get_or_create(
+            user_id=submission.user_id,
+            problem_id=submission.problem_id
+        )
+        ProblemAttemptState.objects.filter(pk=state.pk).update(
+            attempts=F('attempts') + 1,
+            last_submission=submission,
+            last_status=submission.status,
+            last_submitted_at=submission.submitted_at
+        )
+
+
+def update_attempt_state(submission):
+    """Apply a freshly written verdict to the user's attempt state"""
+    if submission.status in ['In Queue', 'Processing']:
+        return
+
+    with transaction.atomic():
+        state, _ = ProblemAttemptState.objects.select_for_update().get_or_create(
+            user_id=submission.user_id,
+            problem_id=submission.problem_id
+        )
+        changes = {}
+        if submission.status not in UNCOUNTED_STATUSES:
+            changes['completed_attempts'] = F('completed_attempts') + 1
+        if state.last_submission_id in (None, submission.id):
+            changes['last_submission'] = submission
+            changes['last_status'] = submission.status
+            changes['last_submitted_at'] = submission.submitted_at
+        if submission.status == 'Accepted':
+            changes['best_score'] = Greatest('best_score', Value(submission.problem.points))
+            if state.first_accepted_at is None or submission.submitted_at < state.first_accepted_at:
+                changes['first_accepted_at'] = submission.submitted_at
+        if changes:
+            ProblemAttemptState.objects.filter(pk=state.pk).update(**changes)
@@ -0,0 +1,56 @@
+"""
+Cache keys for derived data that is served from Django's cache.
+
+Keys are built here so that the views reading the cache and the hooks
+invalidating it always agree on them.
+"""
+import time
+
+from django.core.cache import cache
+
+
+def statistics_cache_key(contest_id):
+    return f'contest:{contest_id}:submission-statistics'
+
+
+def invalidate_contest_statistics(contest_id):
+    cache.delete(statistics_cache_key(contest_id))
+
+
+def frozen_standings_cache_key(contest_id):
+    return f'contest:{contest_id}:frozen-standings'
+
+
+def invalidate_frozen_standings(contest_id):
+    cache.delete(frozen_standings_cache_key(contest_id))
+
+
+# Content versions of contests and problems. A version changes whenever the
+# object or anything nested in its API representation changes (see
+# ``signals``); it keys ETags and the cached serialized bodies, so stale
+# entries are never read and simply expire.
+
+def content_version_key(kind, pk):
+    return f'{kind}:{pk}:version'
+
+
+def content_version(kind, pk):
+    key = content_version_key(kind, pk)
+    version = cache.get(key)
+    if version is None:
+        # Start from the clock so versions handed out before an eviction are never reused
+        cache.add(key, time.time_ns(), None)
+        version = cache.get(key)
+    return version
+
+
+def bump_content_version(kind, pk):
+    key = content_version_key(kind, pk)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, time.time_ns(), None)
+
+
+def content_body_cache_key(scope, pk, version):
+    return f'{scope}:{pk}:{version}:body'
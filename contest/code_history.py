@@ -0,0 +1,123 @@
+"""
+Delta-compressed code history of a coding session.
+
+Code changes are stored as ``CodeSnapshot`` rows. Every ``KEYFRAME_EVERY``-th
+snapshot is a keyframe holding the full code; the others hold a line-level
+diff against the previous snapshot. Payloads are zlib-compressed, so storage
+and write cost follow the size of the edits rather than the session length
+times the code size. The code at any moment is rebuilt from the nearest
+earlier keyframe plus the deltas after it.
+"""
+import difflib
+import json
+import zlib
+
+from django.conf import settings
+from django.db import transaction
+
+from .models import CodeSnapshot, UserActivity
+
+KEYFRAME_EVERY = getattr(settings, 'CODE_HISTORY_KEYFRAME_EVERY', 50)
+
+
+def _compress(value):
+    return zlib.compress(json.dumps(value, separators=(',', ':')).encode('utf-8'))
+
+
+def _decompress(payload):
+    return json.loads(zlib.decompress(bytes(payload)).decode('utf-8'))
+
+
+def make_delta(old, new):
+    """
+    Line diff turning ``old`` into ``new``: a list whose items are either
+    [start, end] (copy those lines of ``old``) or a string (insert it).
+    """
+    old_lines = old.splitlines(keepends=True)
+    new_lines = new.splitlines(keepends=True)
+    operations = []
+    matcher = difflib.SequenceMatcher(None, old_lines, new_lines, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == 'equal':
+            operations.append([i1, i2])
+        elif tag in ('replace', 'insert'):
+            operations.append(''.join(new_lines[j1:j2]))
+    return operations
+
+
+def apply_delta(old, operations):
+    old_lines = old.splitlines(keepends=True)
+    parts = []
+    for operation in operations:
+        if isinstance(operation, str):
+            parts.append(operation)
+        else:
+            parts.extend(old_lines[operation[0]:operation[1]])
+    return ''.join(parts)
+
+
+def _replay(snapshots):
+    """Code after applying snapshots that start with a keyframe, in order"""
+    code = ''
+    for snapshot in snapshots:
+        payload = _decompress(snapshot.payload)
+        code = payload if snapshot.is_keyframe else apply_delta(code, payload)
+    return code
+
+
+def _chain(activity, last_sequence=None):
+    """Snapshots from the keyframe at or before ``last_sequence`` up to it, in order"""
+    snapshots = CodeSnapshot.objects.filter(activity=activity)
+    if last_sequence is not None:
+        snapshots = snapshots.filter(sequence__lte=last_sequence)
+    keyframe = snapshots.filter(is_keyframe=True).order_by('-sequence').values_list('sequence', flat=True).first()
+    if keyframe is None:
+        return []
+    return list(snapshots.filter(sequence__gte=keyframe).order_by('sequence'))
+
+
+def record_code_changes(activity, changes):
+    """
+    Append (code, taken_at) pairs to the session's history in order.
+    Unchanged code is skipped. Returns the snapshots created.
+    """
+    with transaction.atomic():
+        # Locking the session serializes concurrent appends to its history
+        UserActivity.objects.select_for_update().get(pk=activity.pk)
+        chain = _chain(activity)
+        sequence = chain[-1].sequence + 1 if chain else 0
+        previous = _replay(chain) if chain else None
+
+        snapshots = []
+        for code, taken_at in changes:
+            if code == previous:
+                continue
+            if previous is None or sequence % KEYFRAME_EVERY == 0:
+                is_keyframe, payload = True, _compress(code)
+            else:
+                is_keyframe, payload = False, _compress(make_delta(previous, code))
+            snapshots.append(CodeSnapshot(
+                activity=activity,
+                sequence=sequence,
+                taken_at=taken_at,
+                is_keyframe=is_keyframe,
+                payload=payload,
+                code_length=len(code)
+            ))
+            previous = code
+            sequence += 1
+        return CodeSnapshot.objects.bulk_create(snapshots)
+
+
+def code_at(activity, moment):
+    """
+    The session's code after the last change recorded at or before
+    ``moment``, with that change's snapshot; ('', None) if there is none.
+    """
+    last = CodeSnapshot.objects.filter(
+        activity=activity, taken_at__lte=moment
+    ).order_by('-sequence').values_list('sequence', flat=True).first()
+    if last is None:
+        return '', None
+    chain = _chain(activity, last)
+    return _replay(chain), chain[-1]
@@ -0,0 +1,147 @@
+"""
+Shared-account and collusion groups from IP, session and device correlations.
+
+Every submission made during a contest yields up to three identifiers:
+
+- ``session``: its server session id (shared sessions mean a shared login)
+- ``device``: its IP address together with its user agent
+- ``ip``: its IP address
+
+Two users are linked when they used the same identifier within
+``window_minutes`` of each other. All (identifier, time, user) records are
+sorted once, so each identifier's uses sit next to each other in time order
+and links come from one pass with a sliding window, never from pairwise
+queries. Identifiers used by more than ``max_users`` users (campus NAT,
+default browser builds) say nothing about collusion and are skipped.
+
+Linked users are grouped into connected components with union-find and
+stored as ``CollusionGroup`` rows, ranked by the weighted strength of their
+links.
+"""
+from datetime import timedelta
+from itertools import groupby
+
+from django.conf import settings
+from django.db import transaction
+
+from .models import CollusionGroup, CollusionGroupMember, Submission
+from .utils import UnionFind
+
+WINDOW_MINUTES = getattr(settings, 'COLLUSION_WINDOW_MINUTES', 30)
+MAX_USERS_PER_IDENTIFIER = getattr(settings, 'COLLUSION_MAX_USERS_PER_IDENTIFIER', 10)
+
+# Strength of a link through each kind of identifier
+LINK_WEIGHTS = {'session': 3.0, 'device': 2.0, 'ip': 1.0}
+
+# Evidence items kept per group
+MAX_EVIDENCE = 20
+
+
+def _records(contest):
+    """(kind, identifier, time, user id) for every identifier of every submission in the contest window"""
+    submissions = Submission.objects.filter(
+        problem__contest=contest,
+        submitted_at__gte=contest.start_time,
+        submitted_at__lte=contest.end_time
+    ).order_by().values_list('user_id', 'ip_address', 'user_agent', 'session_id', 'submitted_at')
+
+    records = []
+    for user_id, ip_address, user_agent, session_id, submitted_at in submissions.iterator(chunk_size=5000):
+        # Submissions without a server session get a session id derived from their IP
+        if session_id and not session_id.startswith('anonymous_'):
+            records.append(('session', session_id, submitted_at, user_id))
+        if ip_address:
+            records.append(('ip', ip_address, submitted_at, user_id))
+            if user_agent:
+                records.append(('device', f'{ip_address} {user_agent}', submitted_at, user_id))
+    return records
+
+
+def find_links(records, window_minutes=WINDOW_MINUTES, max_users=MAX_USERS_PER_IDENTIFIER):
+    """
+    Links between users from the records, in one pass after a single sort.
+    Returns ({(user1, user2): {kind: shared uses}}, [(kind, identifier, users)])
+    with user1 < user2.
+    """
+    window = timedelta(minutes=window_minutes)
+    links = {}
+    shared = []
+    records.sort(key=lambda record: (record[0], record[1], record[2]))
+    for (kind, identifier), uses in groupby(records, key=lambda record: (record[0], record[1])):
+        uses = list(uses)
+        users = {user_id for _, _, _, user_id in uses}
+        if len(users) < 2 or len(users) > max_users:
+            continue
+
+        # Last use of the identifier by each user, at most max_users entries
+        linked = set()
+        last_used = {}
+        for _, _, used_at, user_id in uses:
+            for other_id, other_used_at in last_used.items():
+                if other_id != user_id and used_at - other_used_at <= window:
+                    pair = (min(user_id, other_id), max(user_id, other_id))
+                    kinds = links.setdefault(pair, {})
+                    kinds[kind] = kinds.get(kind, 0) + 1
+                    linked.update(pair)
+            last_used[user_id] = used_at
+        if linked:
+            shared.append((kind, identifier, sorted(linked)))
+    return links, shared
+
+
+def link_strength(kinds):
+    return sum(LINK_WEIGHTS[kind] for kind in kinds)
+
+
+def build_collusion_groups(contest, window_minutes=WINDOW_MINUTES, max_users=MAX_USERS_PER_IDENTIFIER):
+    """
+    Rebuild the contest's collusion groups from its submissions; previously
+    stored groups are replaced. Returns the groups created.
+    """
+    links, shared = find_links(_records(contest), window_minutes, max_users)
+
+    forest = UnionFind()
+    strength = {}
+    degree = {}
+    for (user1, user2), kinds in links.items():
+        forest.union(user1, user2)
+        for user_id in (user1, user2):
+            strength[user_id] = strength.get(user_id, 0) + link_strength(kinds)
+            degree[user_id] = degree.get(user_id, 0) + 1
+    groups = list(forest.groups().values())
+
+    # Group score: strength of every link inside the group
+    scores = [0.0] * len(groups)
+    index_of = {user_id: index for index, members in enumerate(groups) for user_id in members}
+    for (user1, _), kinds in links.items():
+        scores[index_of[user1]] += link_strength(kinds)
+
+    evidence = [[] for _ in groups]
+    for kind, identifier, users in sorted(shared, key=lambda item: -LINK_WEIGHTS[item[0]]):
+        items = evidence[index_of[users[0]]]
+        if len(items) < MAX_EVIDENCE:
+            items.append({'kind': kind, 'identifier': identifier, 'users': users})
+
+    with transaction.atomic():
+        CollusionGroup.objects.filter(contest=contest).delete()
+        created = CollusionGroup.objects.bulk_create([
+            CollusionGroup(
+                contest=contest,
+                size=len(members),
+                score=score,
+                evidence=items,
+                window_minutes=window_minutes
+            )
+            for members, score, items in zip(groups, scores, evidence)
+        ])
+        CollusionGroupMember.objects.bulk_create([
+            CollusionGroupMember(
+                group=group,
+                user_id=user_id,
+                strength=strength[user_id],
+                linked_users=degree[user_id]
+            )
+            for group, members in zip(created, groups)
+            for user_id in members
+        ], batch_size=1000)
+    return created
@@ -0,0 +1,305 @@
+"""
+Contest leaderboard.
+
+Standings are kept in ``LeaderboardEntry`` rows that are updated each time a
+verdict is written, so reading a page of the leaderboard never has to group
+the submissions table. A problem counts once, on its first accepted
+submission: it adds the problem's points and a penalty of the minutes since
+the contest started plus ``PENALTY_MINUTES`` per earlier rejected attempt.
+
+Every judged verdict is also appended to ``VerdictEvent``. Past standings
+are rebuilt by loading the nearest earlier ``LeaderboardSnapshot`` and
+replaying only the events recorded after it; a snapshot is taken every
+``SNAPSHOT_EVERY`` events. The public scoreboard freezes
+``Contest.freeze_minutes`` before the end and is then served from cache.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .caching import frozen_standings_cache_key, invalidate_frozen_standings
+from .models import LeaderboardEntry, LeaderboardSnapshot, Submission, VerdictEvent
+
+PENALTY_MINUTES = getattr(settings, 'LEADERBOARD_PENALTY_MINUTES', 20)
+SNAPSHOT_EVERY = getattr(settings, 'LEADERBOARD_SNAPSHOT_EVERY', 200)
+
+# Verdicts that cost a penalty once the problem is solved
+REJECTED_STATUSES = ['Wrong Answer', 'Time Limit Exceeded', 'Memory Limit Exceeded', 'Runtime Error']
+
+# Verdicts that put a user on the leaderboard
+JUDGED_STATUSES = ['Accepted'] + REJECTED_STATUSES + ['Compilation Error']
+
+LEADERBOARD_ORDERING = ('-score', 'penalty', 'user_id')
+
+
+def minutes_since_start(contest, moment):
+    return max(0, int((moment - contest.start_time).total_seconds() // 60))
+
+
+def update_leaderboard(submission):
+    """Apply a freshly written verdict to the contest's leaderboard"""
+    if submission.status not in JUDGED_STATUSES:
+        return
+
+    problem = submission.problem
+    contest = problem.contest
+
+    with transaction.atomic():
+        # Locking the user's row serializes concurrent verdicts for them
+        entry, created = LeaderboardEntry.objects.select_for_update().get_or_create(
+            contest=contest,
+            user_id=submission.user_id
+        )
+        if submission.status != 'Accepted':
+            return
+
+        attempts = Submission.objects.filter(problem=problem, user_id=submission.user_id)
+        if attempts.filter(status='Accepted').exclude(pk=submission.pk).exists():
+            return
+
+        rejected = attempts.filter(
+            status__in=REJECTED_STATUSES,
+            submitted_at__lt=submission.submitted_at
+        ).count()
+        penalty = minutes_since_start(contest, submission.submitted_at) + PENALTY_MINUTES * rejected
+
+        last_accepted_at = submission.submitted_at
+        if entry.last_accepted_at and entry.last_accepted_at > last_accepted_at:
+            last_accepted_at = entry.last_accepted_at
+
+        LeaderboardEntry.objects.filter(pk=entry.pk).update(
+            solved_count=F('solved_count') + 1,
+            score=F('score') + problem.points,
+            penalty=F('penalty') + penalty,
+            last_accepted_at=last_accepted_at
+        )
+
+
+class Standings:
+    """
+    In-memory standings built by replaying verdicts in submission order.
+    ``state`` maps user_id -> problem_id -> [rejected attempts, solved at
+    (minutes since start) or None, points].
+    """
+    def __init__(self, contest, state=None):
+        self.contest = contest
+        self.state = state if state is not None else {}
+
+    def apply(self, user_id, problem_id, status, submitted_at, points):
+        if status not in JUDGED_STATUSES:
+            return
+        problem_state = self.state.setdefault(user_id, {}).setdefault(problem_id, [0, None, points])
+        if problem_state[1] is not None:
+            return
+        if status == 'Accepted':
+            problem_state[1] = minutes_since_start(self.contest, submitted_at)
+            problem_state[2] = points
+        elif status in REJECTED_STATUSES:
+            problem_state[0] += 1
+
+    def rows(self):
+        """Standings rows, best first"""
+        rows = []
+        for user_id, problems in self.state.items():
+            solved = [p for p in problems.values() if p[1] is not None]
+            rows.append({
+                'user_id': user_id,
+                'solved_count': len(solved),
+                'score': sum(p[2] for p in solved),
+                'penalty': sum(p[1] + PENALTY_MINUTES * p[0] for p in solved),
+            })
+        rows.sort(key=lambda row: (-row['score'], row['penalty'], row['user_id']))
+        return rows
+
+    @classmethod
+    def from_snapshot(cls, contest, snapshot):
+        """Restore standings from a snapshot (JSON turns the integer keys into strings)"""
+        if snapshot is None:
+            return cls(contest)
+        state = {
+            int(user_id): {int(problem_id): list(problem_state) for problem_id, problem_state in problems.items()}
+            for user_id, problems in snapshot.state.items()
+        }
+        return cls(contest, state)
+
+
+def rebuild_leaderboard(contest):
+    """Recompute a contest's leaderboard from scratch out of its submissions"""
+    standings = Standings(contest)
+    last_accepted = {}
+    verdicts = Submission.objects.filter(
+        problem__contest=contest,
+        status__in=JUDGED_STATUSES
+    ).order_by('submitted_at', 'id').values_list(
+        'user_id', 'problem_id', 'status', 'submitted_at', 'problem__points'
+    )
+    for user_id, problem_id, status, submitted_at, points in verdicts.iterator(chunk_size=5000):
+        already_solved = standings.state.get(user_id, {}).get(problem_id, [0, None])[1] is not None
+        standings.apply(user_id, problem_id, status, submitted_at, points)
+        if status == 'Accepted' and not already_solved:
+            last_accepted[user_id] = submitted_at
+
+    with transaction.atomic():
+        LeaderboardEntry.objects.filter(contest=contest).delete()
+        LeaderboardEntry.objects.bulk_create([
+            LeaderboardEntry(
+                contest=contest,
+                user_id=row['user_id'],
+                solved_count=row['solved_count'],
+                score=row['score'],
+                penalty=row['penalty'],
+                last_accepted_at=last_accepted.get(row['user_id'])
+            )
+            for row in standings.rows()
+        ], batch_size=1000)
+
+
+def leaderboard_page(contest, start, end):
+    """
+    Entries ranked ``start`` to ``end`` (1-based, inclusive) with a ``rank``
+    attribute; tied users share the rank of the first of them.
+    """
+    entries = LeaderboardEntry.objects.filter(contest=contest).select_related('user').order_by(*LEADERBOARD_ORDERING)
+
+    # Fetch the row just before the page to tell whether the first row ties with it
+    offset = max(start - 2, 0)
+    rows = list(entries[offset:end])
+    previous = rows.pop(0) if start > 1 and rows else None
+
+    rank = start
+    if previous is not None and rows and (previous.score, previous.penalty) == (rows[0].score, rows[0].penalty):
+        rank = entries.filter(
+            Q(score__gt=rows[0].score) | Q(score=rows[0].score, penalty__lt=rows[0].penalty)
+        ).count() + 1
+
+    for position, entry in enumerate(rows, start=start):
+        if previous is None or (previous.score, previous.penalty) != (entry.score, entry.penalty):
+            rank = position
+        entry.rank = rank
+        previous = entry
+    return rows
+
+
+def rank_rows(rows):
+    """Add competition ranks to sorted standings rows; tied rows share a rank"""
+    previous = None
+    for position, row in enumerate(rows, start=1):
+        key = (row['score'], row['penalty'])
+        if key != previous:
+            rank = position
+            previous = key
+        row['rank'] = rank
+    return rows
+
+
+def append_verdict_event(submission):
+    """Add a judged verdict to the contest's event log and snapshot it when due"""
+    if submission.status not in JUDGED_STATUSES:
+        return None
+
+    problem = submission.problem
+    contest = problem.contest
+    event = VerdictEvent.objects.create(
+        contest=contest,
+        submission=submission,
+        user_id=submission.user_id,
+        problem=problem,
+        status=submission.status,
+        points=problem.points,
+        submitted_at=submission.submitted_at
+    )
+
+    # A verdict that arrives late invalidates snapshots and frozen standings
+    # taken after its submission time
+    LeaderboardSnapshot.objects.filter(contest=contest, taken_at__gt=event.submitted_at).delete()
+    freeze_at = freeze_time(contest)
+    if freeze_at is not None and event.submitted_at <= freeze_at:
+        invalidate_frozen_standings(contest.id)
+
+    latest = LeaderboardSnapshot.objects.filter(contest=contest).first()
+    if _events_after(contest, latest).count() >= SNAPSHOT_EVERY:
+        take_snapshot(contest)
+    return event
+
+
+def _events_after(contest, snapshot):
+    events = VerdictEvent.objects.filter(contest=contest)
+    if snapshot is not None:
+        events = events.filter(
+            Q(submitted_at__gt=snapshot.taken_at) |
+            Q(submitted_at=snapshot.taken_at, id__gt=snapshot.last_event_id)
+        )
+    return events.order_by('submitted_at', 'id')
+
+
+def _replay(contest, at=None):
+    """Standings and last applied event from the nearest snapshot at or before ``at``"""
+    snapshots = LeaderboardSnapshot.objects.filter(contest=contest)
+    if at is not None:
+        snapshots = snapshots.filter(taken_at__lte=at)
+    snapshot = snapshots.first()
+
+    standings = Standings.from_snapshot(contest, snapshot)
+    last_event = snapshot.last_event if snapshot else None
+    events = _events_after(contest, snapshot)
+    if at is not None:
+        events = events.filter(submitted_at__lte=at)
+    for event in events.iterator(chunk_size=5000):
+        standings.apply(event.user_id, event.problem_id, event.status, event.submitted_at, event.points)
+        last_event = event
+    return standings, last_event
+
+
+def take_snapshot(contest):
+    """Store the standings after every event logged so far"""
+    standings, last_event = _replay(contest)
+    if last_event is None:
+        return None
+    return LeaderboardSnapshot.objects.create(
+        contest=contest,
+        taken_at=last_event.submitted_at,
+        last_event=last_event,
+        state=standings.state
+    )
+
+
+def standings_at(contest, at):
+    """Ranked standings rows as they stood at time ``at``"""
+    standings, _ = _replay(contest, at)
+    rows = rank_rows(standings.rows())
+    usernames = dict(get_user_model().objects.filter(
+        id__in=[row['user_id'] for row in rows]
+    ).values_list('id', 'username'))
+    for row in rows:
+        row['username'] = usernames.get(row['user_id'])
+    return rows
+
+
+def freeze_time(contest):
+    """When the public scoreboard freezes, or None if it never does"""
+    if contest.freeze_minutes <= 0:
+        return None
+    return contest.end_time - timedelta(minutes=contest.freeze_minutes)
+
+
+def is_frozen(contest):
+    freeze_at = freeze_time(contest)
+    return freeze_at is not None and timezone.now() >= freeze_at
+
+
+def frozen_standings(contest):
+    """Public standings at the freeze time, cached until a late verdict changes them"""
+    freeze_at = freeze_time(contest)
+    key = frozen_standings_cache_key(contest.id)
+    cached = cache.get(key)
+    if cached is not None and cached['freeze_at'] == freeze_at:
+        return cached['rows']
+
+    rows = standings_at(contest, freeze_at)
+    cache.set(key, {'freeze_at': freeze_at, 'rows': rows}, None)
+    return rows
@@ -0,0 +1,274 @@
+import random
+import time
+import tracemalloc
+from itertools import combinations
+
+from django.core.management.base import BaseCommand, CommandError
+from contest.plagiarism import (
+    ast_similarity, ast_subtree_hashes, band_keys, estimate_similarity,
+    minhash_signature, text_similarity
+)
+
+# Building blocks for synthetic Python solutions. {f} is the function name,
+# {a}/{b}/{c} are identifiers and {k} is an integer literal.
+FUNCTION_TEMPLATES = [
+    "def {f}({a}):\n    {b} = 0\n    for {c} in {a}:\n        {b} += {c} * {k}\n    return {b}\n",
+    "def {f}({a}, {b}):\n    if {a} < {b}:\n        return {a} + {k}\n    return {b} - {k}\n",
+    "def {f}({a}):\n    {b} = {{}}\n    for {c} in {a}:\n        {b}[{c}] = {b}.get({c}, 0) + 1\n    return {b}\n",
+    "def {f}({a}):\n    {b} = []\n    while {a} > 0:\n        {b}.append({a} % {k})\n        {a} //= {k}\n    return {b}[::-1]\n",
+    "def {f}({a}, {b}):\n    {c} = [[0] * ({b} + 1) for _ in range({a} + 1)]\n    return {c}[{a}][{b}] + {k}\n",
+    "def {f}({a}):\n    {b}, {c} = 0, 1\n    for _ in range({a}):\n        {b}, {c} = {c}, {b} + {c}\n    return {b} % {k}\n",
+    "def {f}({a}):\n    return sorted({a}, key=lambda {b}: ({b} % {k}, -{b}))\n",
+    "def {f}({a}, {b}):\n    {c} = 0\n    while {b}:\n        {a}, {b} = {b}, {a} % {b}\n        {c} += 1\n    return {a} * {k} + {c}\n",
+    "def {f}({a}):\n    {b} = set()\n    for {c} in range(2, {a}):\n        if all({c} % d for d in range(2, {c})):\n            {b}.add({c})\n    return len({b}) + {k}\n",
+    "def {f}({a}):\n    {b} = {a}[:]\n    for {c} in range(len({b}) - 1, 0, -1):\n        if {b}[{c}] < {b}[{c} - 1]:\n            {b}[{c}], {b}[{c} - 1] = {b}[{c} - 1], {b}[{c}]\n    return {b}\n",
+    "def {f}({a}):\n    try:\n        return int({a}) // {k}\n    except ValueError:\n        return -{k}\n",
+    "def {f}({a}, {b}):\n    return [{c} for {c} in {a} if {c} not in {b} and {c} > {k}]\n",
+]
+
+# Extra statements put at the top of a function, so that independently
+# written programs built from the same template still differ in structure the
+# way real solutions do. Copies keep the extras of the program they copy.
+EXTRA_STATEMENTS = [
+    "    assert {a} is not None\n",
+    "    {c} = abs({k} - len(str({a})))\n",
+    "    {c} = max({k}, min({k} * 2, {k} + 1))\n",
+    "    {c} = sum(range({k}))\n",
+    "    {c} = {a}.copy() if hasattr({a}, 'copy') else {a}\n",
+    "    {c} = isinstance({a}, list) and bool({a})\n",
+    "    {c} = '{{}}'.format({k})\n",
+    "    {c} = divmod({k}, 7)[0]\n",
+    "    {c} = any(True for _ in range({k}))\n",
+    "    {c} = round({k} / 3, 2)\n",
+    "    {c} = str({k}).zfill(4)\n",
+    "    {c} = [{k}] * 3\n",
+    "    {c} = {{{k}: {k}}}.get({k})\n",
+    "    {c} = tuple(reversed(range({k})))\n",
+    "    {c} = pow({k}, 2, 97)\n",
+    "    {c} = ord(chr({k}))\n",
+    "    {c} = hash(({k},))\n",
+    "    {c} = frozenset([{k}])\n",
+    "    {c} = list(enumerate([{k}]))\n",
+    "    {c} = ' '.join(map(str, [{k}]))\n",
+]
+
+MAIN_TEMPLATE = "\nif __name__ == '__main__':\n    {a} = list(map(int, input().split()))\n    print({calls})\n"
+
+NAMES = [
+    'data', 'items', 'values', 'result', 'total', 'count', 'idx', 'node', 'acc',
+    'left', 'right', 'mid', 'buf', 'tmp', 'cur', 'prev', 'seen', 'memo', 'grid',
+    'row', 'col', 'val', 'res', 'arr', 'nums', 'stack', 'queue', 'best', 'limit',
+]
+
+MUTATIONS = ['exact', 'renamed', 'reordered']
+
+
+def _new_program(rng):
+    """Random program structure: function blocks plus the names used in main"""
+    blocks = []
+    for position in range(rng.randint(3, 6)):
+        blocks.append({
+            'template': rng.randrange(len(FUNCTION_TEMPLATES)),
+            'f': f'{rng.choice(NAMES)}_{position}',
+            'names': rng.sample(NAMES, 3),
+            'k': rng.randint(2, 97),
+            'extras': rng.sample(range(len(EXTRA_STATEMENTS)), rng.randint(1, 2)),
+        })
+    return {'blocks': blocks, 'input': rng.choice(NAMES)}
+
+
+def _render(program, rename=None, comment=None):
+    rename = rename or {}
+    parts = []
+    for block in program['blocks']:
+        a, b, c = (rename.get(name, name) for name in block['names'])
+        header, body = FUNCTION_TEMPLATES[block['template']].split('\n', 1)
+        extras = ''.join(EXTRA_STATEMENTS[extra] for extra in block['extras'])
+        parts.append(f'{header}\n{extras}{body}'.format(
+            f=rename.get(block['f'], block['f']), a=a, b=b, c=c, k=block['k']
+        ))
+        if comment:
+            parts.append(f'# {comment}\n')
+    name = rename.get(program['input'], program['input'])
+    calls = ', '.join(f"{rename.get(block['f'], block['f'])}" for block in program['blocks'])
+    parts.append(MAIN_TEMPLATE.format(a=name, calls=calls))
+    return '\n'.join(parts)
+
+
+def _mutate(program, level, rng):
+    """Render a copy of a program with the given level of disguise"""
+    if level == 'exact':
+        return _render(program, comment=rng.choice(['step', 'helper', 'todo']))
+
+    used = {program['input']}
+    for block in program['blocks']:
+        used.add(block['f'])
+        used.update(block['names'])
+    rename = {name: f'{name}_{rng.randint(10, 99)}x' for name in used}
+    if level == 'renamed':
+        return _render(program, rename=rename)
+
+    shuffled = dict(program, blocks=rng.sample(program['blocks'], len(program['blocks'])))
+    return _render(shuffled, rename=rename)
+
+
+def generate_corpus(size, copy_rate, seed):
+    """
+    Build a synthetic corpus of ``size`` Python sources where roughly
+    ``copy_rate`` of them are disguised copies of another source.
+    Returns (sources, set of index pairs that are true copies).
+    """
+    rng = random.Random(seed)
+    sources = []
+    families = []
+    while len(sources) < size:
+        program = _new_program(rng)
+        family = [len(sources)]
+        sources.append(_render(program))
+        if rng.random() < copy_rate:
+            for _ in range(rng.randint(1, 3)):
+                if len(sources) >= size:
+                    break
+                family.append(len(sources))
+                sources.append(_mutate(program, rng.choice(MUTATIONS), rng))
+        families.append(family)
+
+    truth = set()
+    for family in families:
+        truth.update(combinations(family, 2))
+    return sources, truth
+
+
+def _pairwise(fingerprints, similarity, threshold):
+    flagged = set()
+    for i, j in combinations(range(len(fingerprints)), 2):
+        if similarity(fingerprints[i], fingerprints[j]) >= threshold:
+            flagged.add((i, j))
+    return flagged, len(fingerprints) * (len(fingerprints) - 1) // 2
+
+
+def run_difflib(sources, threshold):
+    return _pairwise(sources, text_similarity, threshold)
+
+
+def run_ast_subtree(sources, threshold):
+    return _pairwise([ast_subtree_hashes(source) for source in sources], ast_similarity, threshold)
+
+
+def run_minhash_lsh(sources, threshold):
+    signatures = [minhash_signature(source) for source in sources]
+    buckets = {}
+    for index, signature in enumerate(signatures):
+        for key in band_keys(signature):
+            buckets.setdefault(key, []).append(index)
+
+    candidates = set()
+    for members in buckets.values():
+        candidates.update(combinations(members, 2))
+
+    flagged = {
+        pair for pair in candidates
+        if estimate_similarity(signatures[pair[0]], signatures[pair[1]]) >= threshold
+    }
+    return flagged, len(candidates)
+
+
+# Algorithm name -> (runner, default pair budget). Pairwise algorithms are
+# skipped on corpora with more pairs than their budget; None means the
+# algorithm is sub-quadratic and always runs.
+ALGORITHMS = {
+    'difflib': (run_difflib, 10000),
+    'ast_subtree': (run_ast_subtree, 1000000),
+    'minhash_lsh': (run_minhash_lsh, None),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark the plagiarism similarity algorithms on synthetic submission corpora '
+        'and report wall time, peak memory, precision and recall'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes',
+            default='100,1000,10000',
+            help='Comma-separated corpus sizes (default: 100,1000,10000)',
+        )
+        parser.add_argument(
+            '--algorithms',
+            default=','.join(ALGORITHMS),
+            help=f'Comma-separated algorithms to run (default: {",".join(ALGORITHMS)})',
+        )
+        parser.add_argument(
+            '--copy-rate',
+            type=float,
+            default=0.2,
+            help='Fraction of programs that get disguised copies (default: 0.2)',
+        )
+        parser.add_argument(
+            '--threshold',
+            type=float,
+            default=0.8,
+            help='Similarity (0-1) at or above which a pair is flagged (default: 0.8)',
+        )
+        parser.add_argument(
+            '--max-pairs',
+            type=int,
+            help='Skip pairwise algorithms on corpora with more pairs than this '
+                 '(default: 10000 for difflib, 1000000 for ast_subtree)',
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=42,
+            help='Random seed for corpus generation (default: 42)',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            sizes = [int(size) for size in options['sizes'].split(',')]
+        except ValueError:
+            raise CommandError('--sizes must be a comma-separated list of integers')
+
+        algorithms = options['algorithms'].split(',')
+        unknown = [name for name in algorithms if name not in ALGORITHMS]
+        if unknown:
+            raise CommandError(f'Unknown algorithms: {", ".join(unknown)}')
+
+        header = f"{'size':>7}  {'algorithm':<12}  {'pairs scored':>12}  {'time (s)':>9}  {'peak MiB':>9}  {'precision':>9}  {'recall':>7}"
+        self.stdout.write(header)
+        self.stdout.write('-' * len(header))
+
+        for size in sizes:
+            sources, truth = generate_corpus(size, options['copy_rate'], options['seed'])
+            total_pairs = size * (size - 1) // 2
+
+            for name in algorithms:
+                run, budget = ALGORITHMS[name]
+                if budget is not None:
+                    budget = options['max_pairs'] or budget
+                    if total_pairs > budget:
+                        self.stdout.write(
+                            f"{size:>7}  {name:<12}  {'skipped':>12}  ({total_pairs} pairs > {budget})"
+                        )
+                        continue
+
+                started = time.perf_counter()
+                flagged, scored = run(sources, options['threshold'])
+                elapsed = time.perf_counter() - started
+
+                # tracemalloc slows allocation-heavy code down several times,
+                # so peak memory is measured on a second, separate run
+                tracemalloc.start()
+                run(sources, options['threshold'])
+                peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+
+                hits = len(flagged & truth)
+                precision = hits / len(flagged) if flagged else 1.0
+                recall = hits / len(truth) if truth else 1.0
+                self.stdout.write(
+                    f'{size:>7}  {name:<12}  {scored:>12}  {elapsed:>9.2f}  '
+                    f'{peak / (1024 * 1024):>9.1f}  {precision:>9.3f}  {recall:>7.3f}'
+                )
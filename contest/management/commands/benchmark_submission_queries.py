@@ -0,0 +1,219 @@
+import random
+import statistics
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.db.migrations.loader import MigrationLoader
+from django.utils import timezone
+from contest.models import Contest, Problem, Submission
+
+User = get_user_model()
+
+SEED_PREFIX = 'bench-submissions'
+
+# Database aliases the benchmark may seed; it never writes anywhere else
+SCRATCH_DATABASES = getattr(settings, 'BENCHMARK_SCRATCH_DATABASES', [])
+
+STATUS_WEIGHTS = [
+    ('Accepted', 35), ('Wrong Answer', 35), ('Time Limit Exceeded', 8),
+    ('Runtime Error', 8), ('Compilation Error', 8), ('Memory Limit Exceeded', 3),
+    ('In Queue', 2), ('Processing', 1),
+]
+
+
+def seed(database, total, contests, problems_per_contest, users, days, batch_size, rng, log):
+    """Create benchmark contests, problems, users and ``total`` submissions in ``database``"""
+    now = timezone.now()
+    admin = User.objects.using(database).create(username=f'{SEED_PREFIX}-admin', role=User.Role.ADMIN)
+    seeded_contests = [
+        Contest.objects.using(database).create(
+            title=f'{SEED_PREFIX}-{index}', description='Query benchmark contest',
+            start_time=now - timedelta(days=days), end_time=now, created_by=admin
+        )
+        for index in range(contests)
+    ]
+    problems = Problem.objects.using(database).bulk_create([
+        Problem(contest=contest, title=f'{SEED_PREFIX}-{contest.id}-{index}', statement='-')
+        for contest in seeded_contests
+        for index in range(problems_per_contest)
+    ])
+    User.objects.using(database).bulk_create([
+        User(username=f'{SEED_PREFIX}-user-{index}', role=User.Role.STUDENT)
+        for index in range(users)
+    ], batch_size=1000)
+    user_ids = list(User.objects.using(database).filter(
+        username__startswith=f'{SEED_PREFIX}-user-'
+    ).values_list('id', flat=True))
+
+    # submitted_at is auto_now_add. Rows are inserted through a private copy
+    # of the model taken from the migration state, where that can be switched
+    # off so the rows are spread over time without touching the real model.
+    loader = MigrationLoader(connections[database], ignore_no_migrations=True)
+    SeedSubmission = loader.project_state().apps.get_model('contest', 'Submission')
+    SeedSubmission._meta.get_field('submitted_at').auto_now_add = False
+
+    statuses = [status for status, _ in STATUS_WEIGHTS]
+    weights = [weight for _, weight in STATUS_WEIGHTS]
+    span = days * 24 * 3600
+
+    for offset in range(0, total, batch_size):
+        count = min(batch_size, total - offset)
+        SeedSubmission.objects.using(database).bulk_create([
+            SeedSubmission(
+                problem_id=rng.choice(problems).id,
+                user_id=rng.choice(user_ids),
+                language_id=rng.choice([50, 54, 62, 71]),
+                source_code='print(input())',
+                status=rng.choices(statuses, weights)[0],
+                submitted_at=now - timedelta(seconds=rng.randrange(span)),
+            )
+            for _ in range(count)
+        ])
+        log(f'  seeded {offset + count}/{total} submissions')
+
+    return seeded_contests, problems, user_ids
+
+
+def cleanup(database):
+    Contest.objects.using(database).filter(title__startswith=f'{SEED_PREFIX}-').delete()
+    User.objects.using(database).filter(username__startswith=f'{SEED_PREFIX}-').delete()
+
+
+def hot_queries(database, contest, problem, user_id, window_start, window_end):
+    """
+    (name, queryset explained, callable that runs it, indexes any of which
+    the plan is expected to use) for every hot submission query.
+    """
+    submissions = Submission.objects.using(database)
+    attempts = submissions.filter(problem=problem, user_id=user_id)
+    completed = attempts.exclude(status__in=['In Queue', 'Processing'])
+    latest = attempts.order_by('-submitted_at')[:1]
+    contest_page = submissions.filter(problem__contest_id=contest.id).order_by('-submitted_at')[:100]
+    accepted = submissions.filter(problem=problem, status='Accepted')
+    date_range = submissions.filter(submitted_at__gte=window_start, submitted_at__lte=window_end)
+
+    return [
+        ('submission limit: completed attempts', completed, completed.count,
+         {'submission_problem_user_idx'}),
+        ('submission limit: latest attempt', latest, lambda: list(latest.all()),
+         {'submission_problem_user_idx'}),
+        ('analytics: contest page', contest_page, lambda: list(contest_page.all()),
+         {'submission_problem_time_idx', 'submission_time_idx'}),
+        ('plagiarism: accepted per problem', accepted, lambda: list(accepted.values_list('id', flat=True)),
+         {'submission_problem_status_idx'}),
+        ('analytics: date range', date_range, date_range.count,
+         {'submission_time_idx'}),
+    ]
+
+
+class Command(BaseCommand):
+    help = (
+        'Seed a large number of submissions into a scratch database and check that the '
+        'hot submission queries use the expected indexes and stay within a time budget'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--database',
+            required=True,
+            help='Alias of the scratch database to seed; it must be listed in '
+                 'settings.BENCHMARK_SCRATCH_DATABASES',
+        )
+        parser.add_argument(
+            '--submissions',
+            type=int,
+            default=1000000,
+            help='Number of submissions to seed (default: 1000000)',
+        )
+        parser.add_argument('--contests', type=int, default=10, help='Contests to seed (default: 10)')
+        parser.add_argument(
+            '--problems-per-contest', type=int, default=10, help='Problems per contest (default: 10)'
+        )
+        parser.add_argument('--users', type=int, default=5000, help='Users to seed (default: 5000)')
+        parser.add_argument(
+            '--days', type=int, default=30, help='Days the submissions are spread over (default: 30)'
+        )
+        parser.add_argument(
+            '--repeat', type=int, default=20, help='Timed runs per query; the median is reported (default: 20)'
+        )
+        parser.add_argument(
+            '--max-ms',
+            type=float,
+            default=50.0,
+            help='Fail if a query median exceeds this many milliseconds (default: 50)',
+        )
+        parser.add_argument(
+            '--keep',
+            action='store_true',
+            help='Keep the seeded data instead of deleting it afterwards',
+        )
+        parser.add_argument('--seed', type=int, default=42, help='Random seed (default: 42)')
+
+    def handle(self, *args, **options):
+        database = options['database']
+        if database not in SCRATCH_DATABASES:
+            raise CommandError(
+                f"'{database}' is not a scratch database; add its alias to "
+                'settings.BENCHMARK_SCRATCH_DATABASES to let the benchmark write to it'
+            )
+        if database not in connections:
+            raise CommandError(f"Database '{database}' is not configured in settings.DATABASES")
+        if Contest.objects.using(database).filter(title__startswith=f'{SEED_PREFIX}-').exists():
+            raise CommandError('Benchmark data from an earlier run exists; delete it or use a fresh database')
+
+        rng = random.Random(options['seed'])
+        failures = []
+        try:
+            self.stdout.write(f"Seeding {options['submissions']} submissions into '{database}'...")
+            started = time.perf_counter()
+            contests, problems, user_ids = seed(
+                database, options['submissions'], options['contests'], options['problems_per_contest'],
+                options['users'], options['days'], 10000, rng, self.stdout.write
+            )
+            self.stdout.write(f'Seeded in {time.perf_counter() - started:.1f}s')
+
+            connection = connections[database]
+            if connection.vendor in ('sqlite', 'postgresql'):
+                # Refresh planner statistics so plans reflect the seeded data
+                with connection.cursor() as cursor:
+                    cursor.execute('ANALYZE')
+
+            problem = rng.choice(problems)
+            user_id = rng.choice(user_ids)
+            window_end = timezone.now() - timedelta(days=1)
+            queries = hot_queries(
+                database, contests[0], problem, user_id, window_end - timedelta(hours=1), window_end
+            )
+
+            for name, queryset, run, expected_indexes in queries:
+                plan = queryset.explain()
+                used = sorted(index for index in expected_indexes if index in plan)
+
+                timings = []
+                for _ in range(options['repeat']):
+                    started = time.perf_counter()
+                    run()
+                    timings.append((time.perf_counter() - started) * 1000)
+                median = statistics.median(timings)
+
+                ok = bool(used) and median <= options['max_ms']
+                style = self.style.SUCCESS if ok else self.style.ERROR
+                self.stdout.write(style(
+                    f"{'OK  ' if ok else 'FAIL'} {name:<40} {median:>8.2f} ms  "
+                    f"index: {', '.join(used) or 'none of ' + ', '.join(sorted(expected_indexes))}"
+                ))
+                if not ok:
+                    self.stdout.write(f'     plan: {plan}')
+                    failures.append(name)
+        finally:
+            # Also runs when seeding fails or is interrupted part way
+            if not options['keep']:
+                self.stdout.write('Deleting benchmark data...')
+                cleanup(database)
+
+        if failures:
+            raise CommandError(f'Queries missing their index or over budget: {", ".join(failures)}')
@@ -0,0 +1,48 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from contest.models import LSHBucket, SubmissionFingerprint
+from contest.plagiarism import index_submission, unindexed_accepted_submissions, update_similarity_score
+
+
+class Command(BaseCommand):
+    help = (
+        'Compute MinHash signatures, LSH buckets and code similarity scores '
+        'for accepted submissions that are not indexed yet'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=500,
+            help='Number of submissions loaded from the database at a time',
+        )
+        parser.add_argument(
+            '--rebuild',
+            action='store_true',
+            help='Drop every fingerprint and LSH bucket first and index all accepted submissions again '
+                 '(needed after the fingerprint format changes)',
+        )
+
+    def handle(self, *args, **options):
+        if options['rebuild']:
+            with transaction.atomic():
+                LSHBucket.objects.all().delete()
+                SubmissionFingerprint.objects.all().delete()
+            self.stdout.write('Dropped existing fingerprints')
+
+        # Oldest first, so every submission is scored against indexed earlier ones
+        submissions = unindexed_accepted_submissions().only(
+            'id', 'problem_id', 'user_id', 'language_id', 'source_code', 'submitted_at'
+        ).order_by('submitted_at', 'id')
+
+        indexed = 0
+        for submission in submissions.iterator(chunk_size=options['chunk_size']):
+            update_similarity_score(submission, index_submission(submission))
+            indexed += 1
+            if indexed % 1000 == 0:
+                self.stdout.write(f'Indexed {indexed} submissions...')
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Indexed {indexed} accepted submissions')
+        )
@@ -0,0 +1,80 @@
+from django.core.management.base import BaseCommand
+from contest.models import Contest
+from contest.retention import (
+    CHUNK_SIZE, RETENTION_DAYS, compact_contest, estimate_compaction, expired_contests
+)
+from contest.scoring import numpy_available
+
+
+def _size(value):
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if value < 1024 or unit == 'GB':
+            return f'{value:.1f} {unit}' if unit != 'B' else f'{value} B'
+        value /= 1024
+
+
+class Command(BaseCommand):
+    help = (
+        'Downsample the raw telemetry of ended contests into per-session summaries '
+        'and delete the expired events (run it on a schedule)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--contest-id',
+            type=int,
+            help='Contest to compact, even if its retention period has not passed',
+        )
+        parser.add_argument(
+            '--retention-days',
+            type=int,
+            default=RETENTION_DAYS,
+            help=f'Days after a contest ends that raw events are kept (default: {RETENTION_DAYS})',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=CHUNK_SIZE,
+            help=f'Events deleted per transaction (default: {CHUNK_SIZE})',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Report what would be deleted without changing anything',
+        )
+
+    def handle(self, *args, **options):
+        if options.get('contest_id'):
+            contests = Contest.objects.filter(id=options['contest_id'])
+            if not contests.exists():
+                self.stdout.write(
+                    self.style.ERROR(f"Contest with ID {options['contest_id']} not found")
+                )
+                return
+        else:
+            contests = expired_contests(retention_days=options['retention_days'])
+
+        if not options['dry_run'] and not numpy_available():
+            self.stdout.write(self.style.WARNING(
+                'numpy is not installed: unscored sessions are compacted without a suspicion score'
+            ))
+
+        total_events = total_bytes = 0
+        for contest in contests:
+            if options['dry_run']:
+                report = estimate_compaction(contest)
+                action = 'Would compact'
+            else:
+                report = compact_contest(contest, options['chunk_size'])
+                action = 'Compacted'
+            total_events += report['events_deleted']
+            total_bytes += report['bytes_reclaimed']
+            self.stdout.write(self.style.SUCCESS(
+                f"{action} contest: {contest.title} (ID: {contest.id}): "
+                f"{report['sessions']} sessions summarized, {report['events_deleted']} events deleted, "
+                f"~{_size(report['bytes_reclaimed'])} reclaimed"
+            ))
+
+        self.stdout.write(
+            f'Total: {total_events} events deleted, ~{_size(total_bytes)} reclaimed'
+        )
@@ -0,0 +1,38 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from contest.models import Contest
+from contest.paste_detection import detect_contest_bursts
+from contest.scoring import numpy_available
+
+
+class Command(BaseCommand):
+    help = 'Flag code changes that appeared with too few keystrokes in contest sessions not yet compacted (requires numpy)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--contest-id',
+            type=int,
+            help='Contest to scan (default: all contests)',
+        )
+
+    def handle(self, *args, **options):
+        if not numpy_available():
+            raise CommandError('Paste-burst detection requires numpy')
+
+        contests = Contest.objects.all()
+        if options.get('contest_id'):
+            contests = contests.filter(id=options['contest_id'])
+            if not contests.exists():
+                self.stdout.write(
+                    self.style.ERROR(f"Contest with ID {options['contest_id']} not found")
+                )
+                return
+
+        for contest in contests:
+            started = time.perf_counter()
+            sessions, bursts = detect_contest_bursts(contest)
+            self.stdout.write(self.style.SUCCESS(
+                f'Found {bursts} paste bursts in {sessions} sessions of contest: {contest.title} '
+                f'(ID: {contest.id}) in {time.perf_counter() - started:.2f}s'
+            ))
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+from contest.leaderboard import rebuild_leaderboard
+from contest.models import Contest
+
+
+class Command(BaseCommand):
+    help = 'Recompute contest leaderboards from their submissions'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--contest-id',
+            type=int,
+            help='Contest to rebuild (default: all contests)',
+        )
+
+    def handle(self, *args, **options):
+        contests = Contest.objects.all()
+        if options.get('contest_id'):
+            contests = contests.filter(id=options['contest_id'])
+            if not contests.exists():
+                self.stdout.write(
+                    self.style.ERROR(f"Contest with ID {options['contest_id']} not found")
+                )
+                return
+
+        for contest in contests:
+            rebuild_leaderboard(contest)
+            self.stdout.write(
+                self.style.SUCCESS(f'Rebuilt leaderboard for contest: {contest.title} (ID: {contest.id})')
+            )
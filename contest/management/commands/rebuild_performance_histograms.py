@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+from contest.models import Problem
+from contest.performance import rebuild_histograms
+
+
+class Command(BaseCommand):
+    help = 'Recompute the runtime and memory histograms of problems from their accepted submissions'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--problem-id',
+            type=int,
+            help='Problem to rebuild (default: all problems)',
+        )
+
+    def handle(self, *args, **options):
+        problems = Problem.objects.all()
+        if options.get('problem_id'):
+            problems = problems.filter(id=options['problem_id'])
+            if not problems.exists():
+                self.stdout.write(
+                    self.style.ERROR(f"Problem with ID {options['problem_id']} not found")
+                )
+                return
+
+        for problem in problems:
+            rebuild_histograms(problem)
+            self.stdout.write(
+                self.style.SUCCESS(f'Rebuilt histograms for problem: {problem.title} (ID: {problem.id})')
+            )
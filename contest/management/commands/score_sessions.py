@@ -0,0 +1,37 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from contest.models import Contest
+from contest.scoring import numpy_available, score_contest_sessions
+
+
+class Command(BaseCommand):
+    help = 'Compute the suspicion score of every coding session of contests not yet compacted (requires numpy)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--contest-id',
+            type=int,
+            help='Contest to score (default: all contests)',
+        )
+
+    def handle(self, *args, **options):
+        if not numpy_available():
+            raise CommandError('Session scoring requires numpy')
+
+        contests = Contest.objects.all()
+        if options.get('contest_id'):
+            contests = contests.filter(id=options['contest_id'])
+            if not contests.exists():
+                self.stdout.write(
+                    self.style.ERROR(f"Contest with ID {options['contest_id']} not found")
+                )
+                return
+
+        for contest in contests:
+            started = time.perf_counter()
+            scored = score_contest_sessions(contest)
+            self.stdout.write(self.style.SUCCESS(
+                f'Scored {scored} sessions of contest: {contest.title} (ID: {contest.id}) '
+                f'in {time.perf_counter() - started:.2f}s'
+            ))
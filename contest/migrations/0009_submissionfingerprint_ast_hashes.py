@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contest', '0008_submissionfingerprint_lshbucket'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='submissionfingerprint',
+            name='ast_hashes',
+            field=models.JSONField(blank=True, help_text='Normalized AST subtree hash counts (Python submissions only)', null=True),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:24
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contest', '0009_submissionfingerprint_ast_hashes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PlagiarismCluster',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('threshold', models.FloatField(help_text='Similarity percentage used to link submissions')),
+                ('max_similarity', models.FloatField(help_text='Highest similarity between two members (0-100)')),
+                ('size', models.IntegerField(default=0, help_text='Number of submissions in the cluster')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('contest', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='plagiarism_clusters', to='contest.contest')),
+            ],
+            options={
+                'ordering': ['-max_similarity', '-size'],
+            },
+        ),
+        migrations.CreateModel(
+            name='PlagiarismClusterMember',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('max_similarity', models.FloatField(help_text='Highest similarity to another member of the cluster')),
+                ('cluster', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='members', to='contest.plagiarismcluster')),
+                ('submission', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='plagiarism_clusters', to='contest.submission')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='plagiarism_clusters', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-max_similarity'],
+            },
+        ),
+    ]
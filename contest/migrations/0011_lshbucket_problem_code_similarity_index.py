@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:32
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def populate_bucket_problems(apps, schema_editor):
+    LSHBucket = apps.get_model('contest', 'LSHBucket')
+    Submission = apps.get_model('contest', 'Submission')
+    db = schema_editor.connection.alias
+    LSHBucket.objects.using(db).filter(problem__isnull=True).update(
+        problem_id=models.Subquery(
+            Submission.objects.using(db).filter(pk=models.OuterRef('submission_id')).values('problem_id')[:1]
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contest', '0010_plagiarismcluster'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='lshbucket',
+            name='problem',
+            field=models.ForeignKey(help_text='Problem of the submission, for per-problem lookups', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='lsh_buckets', to='contest.problem'),
+        ),
+        migrations.RunPython(populate_bucket_problems, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='submission',
+            name='code_similarity_score',
+            field=models.FloatField(blank=True, db_index=True, help_text='Highest similarity (0-1) to an earlier submission by another user', null=True),
+        ),
+        migrations.AddIndex(
+            model_name='lshbucket',
+            index=models.Index(fields=['problem', 'key'], name='lshbucket_problem_key_idx'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:34
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contest', '0011_lshbucket_problem_code_similarity_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeaderboardEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('solved_count', models.IntegerField(default=0, help_text='Number of problems solved')),
+                ('score', models.IntegerField(default=0, help_text='Sum of the points of solved problems')),
+                ('penalty', models.IntegerField(default=0, help_text='Penalty time in minutes')),
+                ('last_accepted_at', models.DateTimeField(blank=True, help_text='Time of the latest first-accepted submission', null=True)),
+                ('contest', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='leaderboard', to='contest.contest')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='leaderboard_entries', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-score', 'penalty', 'user'],
+                'indexes': [models.Index(fields=['contest', '-score', 'penalty', 'user'], name='leaderboard_rank_idx')],
+                'unique_together': {('contest', 'user')},
+            },
+        ),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:35
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contest', '0012_leaderboardentry'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='contest',
+            name='freeze_minutes',
+            field=models.IntegerField(default=60, help_text='Minutes before the end when the public scoreboard freezes (0 = never)'),
+        ),
+        migrations.CreateModel(
+            name='VerdictEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('In Queue', 'In Queue'), ('Processing', 'Processing'), ('Accepted', 'Accepted'), ('Wrong Answer', 'Wrong Answer'), ('Time Limit Exceeded', 'Time Limit Exceeded'), ('Memory Limit Exceeded', 'Memory Limit Exceeded'), ('Runtime Error', 'Runtime Error'), ('Compilation Error', 'Compilation Error'), ('Internal Error', 'Internal Error')], max_length=50)),
+                ('points', models.IntegerField(help_text='Points of the problem when the verdict was written')),
+                ('submitted_at', models.DateTimeField(help_text='Submission time the verdict counts at')),
+                ('recorded_at', models.DateTimeField(auto_now_add=True)),
+                ('contest', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='verdict_events', to='contest.contest')),
+                ('problem', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='verdict_events', to='contest.problem')),
+                ('submission', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='verdict_events', to='contest.submission')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='verdict_events', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['submitted_at', 'id'],
+            },
+        ),
+        migrations.CreateModel(
+            name='LeaderboardSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('taken_at', models.DateTimeField(help_text='Submission time of the last event included')),
+                ('state', models.JSONField(default=dict, help_text='Per-user, per-problem replay state')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('contest', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='leaderboard_snapshots', to='contest.contest')),
+                ('last_event', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='contest.verdictevent')),
+            ],
+            options={
+                'ordering': ['-taken_at', '-last_event'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='verdictevent',
+            index=models.Index(fields=['contest', 'submitted_at', 'id'], name='verdictevent_contest_time_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='leaderboardsnapshot',
+            index=models.Index(fields=['contest', 'taken_at'], name='snapshot_contest_time_idx'),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contest', '0013_verdictevent_leaderboardsnapshot'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SubmissionRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bucket', models.DateTimeField(help_text='Submission time truncated to the minute (UTC)')),
+                ('status', models.CharField(choices=[('In Queue', 'In Queue'), ('Processing', 'Processing'), ('Accepted', 'Accepted'), ('Wrong Answer', 'Wrong Answer'), ('Time Limit Exceeded', 'Time Limit Exceeded'), ('Memory Limit Exceeded', 'Memory Limit Exceeded'), ('Runtime Error', 'Runtime Error'), ('Compilation Error', 'Compilation Error'), ('Internal Error', 'Internal Error')], max_length=50)),
+                ('language_id', models.IntegerField(help_text='Judge0 language ID')),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('contest', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='submission_rollups', to='contest.contest')),
+                ('problem', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='submission_rollups', to='contest.problem')),
+            ],
+            options={
+                'ordering': ['bucket'],
+                'indexes': [models.Index(fields=['contest', 'bucket'], name='rollup_contest_bucket_idx')],
+                'unique_together': {('contest', 'problem', 'bucket', 'status', 'language_id')},
+            },
+        ),
+    ]
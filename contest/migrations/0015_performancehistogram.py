@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:41
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contest', '0014_submissionrollup'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PerformanceHistogram',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('language_id', models.IntegerField(help_text='Judge0 language ID')),
+                ('metric', models.CharField(choices=[('time', 'Runtime (ms)'), ('memory', 'Memory (KB)')], max_length=10)),
+                ('bucket', models.IntegerField(help_text='Geometric bucket index, see contest.performance')),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('problem', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='performance_histograms', to='contest.problem')),
+            ],
+            options={
+                'ordering': ['problem', 'language_id', 'metric', 'bucket'],
+                'unique_together': {('problem', 'language_id', 'metric', 'bucket')},
+            },
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:46
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contest', '0015_performancehistogram'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='submission',
+            index=models.Index(fields=['problem', 'user', '-submitted_at'], name='submission_problem_user_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='submission',
+            index=models.Index(fields=['problem', '-submitted_at'], name='submission_problem_time_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='submission',
+            index=models.Index(fields=['problem', 'status', '-submitted_at'], name='submission_problem_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='submission',
+            index=models.Index(fields=['submitted_at'], name='submission_time_idx'),
+        ),
+        # Drop the single-column FK index only once the composites covering it exist
+        migrations.AlterField(
+            model_name='submission',
+            name='problem',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='submissions', to='contest.problem'),
+        ),
+    ]
@@ -0,0 +1,72 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:48
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def populate_attempt_states(apps, schema_editor):
+    Submission = apps.get_model('contest', 'Submission')
+    ProblemAttemptState = apps.get_model('contest', 'ProblemAttemptState')
+    db = schema_editor.connection.alias
+
+    latest = Submission.objects.using(db).filter(
+        problem_id=models.OuterRef('problem_id'), user_id=models.OuterRef('user_id')
+    ).order_by('-submitted_at', '-id').values('id')[:1]
+    rows = Submission.objects.using(db).values('user_id', 'problem_id').annotate(
+        attempts=models.Count('id'),
+        completed_attempts=models.Count(
+            'id', filter=~models.Q(status__in=['In Queue', 'Processing', 'Internal Error'])
+        ),
+        first_accepted_at=models.Min('submitted_at', filter=models.Q(status='Accepted')),
+        last_submission_id=models.Subquery(latest)
+    ).order_by()
+
+    states = [ProblemAttemptState(**row) for row in rows]
+    for start in range(0, len(states), 2000):
+        _save_states(db, Submission, ProblemAttemptState, states[start:start + 2000])
+
+
+def _save_states(db, Submission, ProblemAttemptState, states):
+    last = Submission.objects.using(db).in_bulk([state.last_submission_id for state in states])
+    points = dict(Submission.objects.using(db).filter(
+        id__in=[state.last_submission_id for state in states]
+    ).values_list('problem_id', 'problem__points'))
+    for state in states:
+        submission = last[state.last_submission_id]
+        state.last_status = submission.status
+        state.last_submitted_at = submission.submitted_at
+        if state.first_accepted_at is not None:
+            state.best_score = points[state.problem_id]
+    ProblemAttemptState.objects.using(db).bulk_create(states)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contest', '0016_submission_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProblemAttemptState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('attempts', models.PositiveIntegerField(default=0, help_text='Submissions made')),
+                ('completed_attempts', models.PositiveIntegerField(default=0, help_text='Submissions that got a verdict other than Internal Error')),
+                ('last_status', models.CharField(blank=True, max_length=50)),
+                ('last_submitted_at', models.DateTimeField(blank=True, null=True)),
+                ('first_accepted_at', models.DateTimeField(blank=True, null=True)),
+                ('best_score', models.IntegerField(default=0, help_text='Points earned on the problem')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('last_submission', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='contest.submission')),
+                ('problem', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attempt_states', to='contest.problem')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attempt_states', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'unique_together': {('user', 'problem')},
+            },
+        ),
+        migrations.RunPython(populate_attempt_states, migrations.RunPython.noop),
+    ]
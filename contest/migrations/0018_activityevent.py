@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:49
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contest', '0017_problemattemptstate'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='useractivity',
+            name='event_count',
+            field=models.IntegerField(default=0, help_text='Telemetry events received'),
+        ),
+        migrations.AddField(
+            model_name='useractivity',
+            name='keystroke_count',
+            field=models.IntegerField(default=0, help_text='Keystrokes reported by telemetry'),
+        ),
+        migrations.CreateModel(
+            name='ActivityEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('event_type', models.CharField(choices=[('keystroke', 'Keystrokes'), ('code_change', 'Code change'), ('copy_paste', 'Copy-paste'), ('focus_lost', 'Browser focus lost'), ('mouse_move', 'Mouse movement'), ('idle', 'Idle period'), ('external_resource', 'External resource access'), ('suspicious', 'Suspicious activity')], max_length=30)),
+                ('occurred_at', models.DateTimeField(help_text='Client-side time of the event')),
+                ('data', models.JSONField(blank=True, default=dict, help_text='Event payload')),
+                ('received_at', models.DateTimeField(auto_now_add=True)),
+                ('activity', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='events', to='contest.useractivity')),
+            ],
+            options={
+                'ordering': ['occurred_at', 'id'],
+                'indexes': [models.Index(fields=['activity', 'occurred_at'], name='activityevent_session_time_idx')],
+            },
+        ),
+    ]
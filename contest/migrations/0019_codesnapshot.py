@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:50
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contest', '0018_activityevent'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CodeSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sequence', models.PositiveIntegerField(help_text="Position in the session's history, from 0")),
+                ('taken_at', models.DateTimeField()),
+                ('is_keyframe', models.BooleanField(default=False)),
+                ('payload', models.BinaryField(help_text='Compressed code (keyframe) or diff operations (delta)')),
+                ('code_length', models.IntegerField(help_text='Length of the code after this change')),
+                ('activity', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='code_snapshots', to='contest.useractivity')),
+            ],
+            options={
+                'ordering': ['activity', 'sequence'],
+                'indexes': [models.Index(fields=['activity', 'taken_at'], name='codesnapshot_session_time_idx')],
+                'unique_together': {('activity', 'sequence')},
+            },
+        ),
+    ]
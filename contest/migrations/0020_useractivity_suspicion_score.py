@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contest', '0019_codesnapshot'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='useractivity',
+            name='scored_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='useractivity',
+            name='suspicion_features',
+            field=models.JSONField(blank=True, default=dict, help_text='Features the suspicion score was computed from'),
+        ),
+        migrations.AddField(
+            model_name='useractivity',
+            name='suspicion_score',
+            field=models.FloatField(blank=True, db_index=True, help_text='Suspicion score (0-100) of the session', null=True),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contest', '0020_useractivity_suspicion_score'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='useractivity',
+            name='compacted_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='useractivity',
+            name='telemetry_summary',
+            field=models.JSONField(blank=True, default=dict, help_text='Per-type and per-minute event counts of compacted telemetry'),
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.18 on 2026-10-19 10:01
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contest', '0021_useractivity_compaction'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CollusionGroup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('size', models.IntegerField(default=0, help_text='Number of users in the group')),
+                ('score', models.FloatField(default=0, help_text='Weighted strength of the links between members')),
+                ('evidence', models.JSONField(default=list, help_text='Shared identifiers that link the members')),
+                ('window_minutes', models.IntegerField(help_text='Time window within which shared use links two users')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('contest', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='collusion_groups', to='contest.contest')),
+            ],
+            options={
+                'ordering': ['-score', '-size'],
+            },
+        ),
+        migrations.CreateModel(
+            name='CollusionGroupMember',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('strength', models.FloatField(help_text="Weighted strength of the user's links to other members")),
+                ('linked_users', models.IntegerField(help_text='Other members the user is directly linked to')),
+                ('group', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='members', to='contest.collusiongroup')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='collusion_groups', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-strength'],
+            },
+        ),
+    ]
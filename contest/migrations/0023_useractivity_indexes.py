@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-19 10:05
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contest', '0022_collusiongroup'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='useractivity',
+            index=models.Index(fields=['problem', 'user', 'started_at'], name='useractivity_problem_user_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='useractivity',
+            index=models.Index(fields=['started_at', 'id'], name='useractivity_started_idx'),
+        ),
+    ]
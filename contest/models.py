@@ -13,6 +13,7 @@ class Contest(models.Model):
     share_enabled = models.BooleanField(default=False, help_text="Whether the contest can be shared publicly")
     share_link = models.CharField(max_length=255, blank=True, null=True, help_text="Public link that can be shared if sharing is enabled")
     is_active = models.BooleanField(default=True)
+    freeze_minutes = models.IntegerField(default=60, help_text="Minutes before the end when the public scoreboard freezes (0 = never)")
 
     def __str__(self):
         return self.title
@@ -68,7 +69,8 @@ class Submission(models.Model):
         ('Internal Error', 'Internal Error'),
     ]
     
-    problem = models.ForeignKey(Problem, related_name='submissions', on_delete=models.CASCADE)
+    # Not indexed on its own: the composite indexes below all start with problem
+    problem = models.ForeignKey(Problem, related_name='submissions', on_delete=models.CASCADE, db_index=False)
     user = models.ForeignKey(User, related_name='submissions', on_delete=models.CASCADE)
     language_id = models.IntegerField(help_text="Judge0 language ID")
     source_code = models.TextField(help_text="User's source code")
@@ -96,10 +98,20 @@ class Submission(models.Model):
     keystrokes_count = models.IntegerField(null=True, blank=True, help_text="Number of keystrokes")
     copy_paste_events = models.IntegerField(default=0, help_text="Number of copy-paste events detected")
     tab_switches = models.IntegerField(default=0, help_text="Number of tab switches during coding")
-    code_similarity_score = models.FloatField(null=True, blank=True, help_text="Similarity score with other submissions")
+    code_similarity_score = models.FloatField(null=True, blank=True, db_index=True, help_text="Highest similarity (0-1) to an earlier submission by another user")
     
     class Meta:
         ordering = ['-submitted_at']
+        indexes = [
+            # Submission limit checks and a user's latest attempt at a problem
+            models.Index(fields=['problem', 'user', '-submitted_at'], name='submission_problem_user_idx'),
+            # Per-problem listings, newest first (contest listings join through problem)
+            models.Index(fields=['problem', '-submitted_at'], name='submission_problem_time_idx'),
+            # Accepted submissions of a problem for plagiarism detection, newest first
+            models.Index(fields=['problem', 'status', '-submitted_at'], name='submission_problem_status_idx'),
+            # Date range filters in analytics
+            models.Index(fields=['submitted_at'], name='submission_time_idx'),
+        ]
     
     def __str__(self):
         return f"{self.user.username} - {self.problem.title} - {self.submitted_at}"
@@ -127,15 +139,63 @@ class UserActivity(models.Model):
     browser_focus_lost = models.IntegerField(default=0, help_text="Times browser lost focus")
     copy_paste_attempts = models.IntegerField(default=0, help_text="Copy-paste attempts")
     external_resource_access = models.JSONField(default=list, help_text="External resources accessed")
+
+    # Running totals of the ActivityEvent rows ingested for this session
+    event_count = models.IntegerField(default=0, help_text="Telemetry events received")
+    keystroke_count = models.IntegerField(default=0, help_text="Keystrokes reported by telemetry")
+
+    # Output of the vectorized scoring engine (contest.scoring)
+    suspicion_score = models.FloatField(null=True, blank=True, db_index=True, help_text="Suspicion score (0-100) of the session")
+    suspicion_features = models.JSONField(default=dict, blank=True, help_text="Features the suspicion score was computed from")
+    scored_at = models.DateTimeField(null=True, blank=True)
+
+    # Aggregates kept once the raw telemetry is compacted (contest.retention)
+    telemetry_summary = models.JSONField(default=dict, blank=True, help_text="Per-type and per-minute event counts of compacted telemetry")
+    compacted_at = models.DateTimeField(null=True, blank=True)
     
     class Meta:
         unique_together = ['user', 'problem', 'session_id']
         ordering = ['-started_at']
+        indexes = [
+            # Activity monitoring: sessions of a problem (and user), newest first
+            models.Index(fields=['problem', 'user', 'started_at'], name='useractivity_problem_user_idx'),
+            # Contest-wide monitoring: walked newest first, stopping after one page
+            models.Index(fields=['started_at', 'id'], name='useractivity_started_idx'),
+        ]
     
     def __str__(self):
         return f"{self.user.username} - {self.problem.title} - Session {self.session_id}"
 
 
+class ActivityEvent(models.Model):
+    """Append-only telemetry event reported by the client during a session"""
+    EVENT_TYPES = [
+        ('keystroke', 'Keystrokes'),
+        ('code_change', 'Code change'),
+        ('copy_paste', 'Copy-paste'),
+        ('focus_lost', 'Browser focus lost'),
+        ('mouse_move', 'Mouse movement'),
+        ('idle', 'Idle period'),
+        ('external_resource', 'External resource access'),
+        ('suspicious', 'Suspicious activity'),
+    ]
+
+    activity = models.ForeignKey(UserActivity, on_delete=models.CASCADE, related_name='events')
+    event_type = models.CharField(max_length=30, choices=EVENT_TYPES)
+    occurred_at = models.DateTimeField(help_text="Client-side time of the event")
+    data = models.JSONField(default=dict, blank=True, help_text="Event payload")
+    received_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['occurred_at', 'id']
+        indexes = [
+            models.Index(fields=['activity', 'occurred_at'], name='activityevent_session_time_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.activity_id} - {self.event_type} - {self.occurred_at}"
+
+
 class PlagiarismCheck(models.Model):
     """Store plagiarism detection results"""
     submission1 = models.ForeignKey(Submission, on_delete=models.CASCADE, related_name='plagiarism_checks_as_first')
@@ -151,4 +211,231 @@ class PlagiarismCheck(models.Model):
         ordering = ['-similarity_score', '-flagged_at']
     
     def __str__(self):
-        return f"Similarity: {self.similarity_score}% - {self.submission1.user.username} vs {self.submission2.user.username}"
\ No newline at end of file
+        return f"Similarity: {self.similarity_score}% - {self.submission1.user.username} vs {self.submission2.user.username}"
+
+class SubmissionFingerprint(models.Model):
+    """Precomputed similarity fingerprints of an accepted submission"""
+    submission = models.OneToOneField(Submission, on_delete=models.CASCADE, related_name='fingerprint')
+    minhash = models.JSONField(default=list, help_text="MinHash signature of the normalized source code")
+    ast_hashes = models.JSONField(null=True, blank=True, help_text="Normalized AST subtree hash counts (Python submissions only)")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Fingerprint - Submission {self.submission_id}"
+
+
+class LSHBucket(models.Model):
+    """LSH band bucket entry used to find near-duplicate submissions across the archive"""
+    key = models.CharField(max_length=32, db_index=True, help_text="Band number and hash of the band's signature rows")
+    submission = models.ForeignKey(Submission, on_delete=models.CASCADE, related_name='lsh_buckets')
+    problem = models.ForeignKey(Problem, on_delete=models.CASCADE, null=True, related_name='lsh_buckets', help_text="Problem of the submission, for per-problem lookups")
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['problem', 'key'], name='lshbucket_problem_key_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.key} - Submission {self.submission_id}"
+
+
+class PlagiarismCluster(models.Model):
+    """Group of submissions connected by plagiarism checks above a threshold"""
+    contest = models.ForeignKey(Contest, on_delete=models.CASCADE, related_name='plagiarism_clusters')
+    threshold = models.FloatField(help_text="Similarity percentage used to link submissions")
+    max_similarity = models.FloatField(help_text="Highest similarity between two members (0-100)")
+    size = models.IntegerField(default=0, help_text="Number of submissions in the cluster")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-max_similarity', '-size']
+
+    def __str__(self):
+        return f"Cluster of {self.size} - {self.max_similarity}% - {self.contest.title}"
+
+
+class PlagiarismClusterMember(models.Model):
+    """Submission belonging to a plagiarism cluster"""
+    cluster = models.ForeignKey(PlagiarismCluster, on_delete=models.CASCADE, related_name='members')
+    submission = models.ForeignKey(Submission, on_delete=models.CASCADE, related_name='plagiarism_clusters')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='plagiarism_clusters')
+    max_similarity = models.FloatField(help_text="Highest similarity to another member of the cluster")
+
+    class Meta:
+        ordering = ['-max_similarity']
+
+    def __str__(self):
+        return f"{self.user.username} - Submission {self.submission_id}"
+
+
+class CollusionGroup(models.Model):
+    """Users of a contest linked by shared IP addresses, sessions or devices"""
+    contest = models.ForeignKey(Contest, on_delete=models.CASCADE, related_name='collusion_groups')
+    size = models.IntegerField(default=0, help_text="Number of users in the group")
+    score = models.FloatField(default=0, help_text="Weighted strength of the links between members")
+    evidence = models.JSONField(default=list, help_text="Shared identifiers that link the members")
+    window_minutes = models.IntegerField(help_text="Time window within which shared use links two users")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-score', '-size']
+
+    def __str__(self):
+        return f"Group of {self.size} - score {self.score} - {self.contest.title}"
+
+
+class CollusionGroupMember(models.Model):
+    """User belonging to a collusion group"""
+    group = models.ForeignKey(CollusionGroup, on_delete=models.CASCADE, related_name='members')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='collusion_groups')
+    strength = models.FloatField(help_text="Weighted strength of the user's links to other members")
+    linked_users = models.IntegerField(help_text="Other members the user is directly linked to")
+
+    class Meta:
+        ordering = ['-strength']
+
+    def __str__(self):
+        return f"{self.user.username} - Group {self.group_id}"
+
+
+class LeaderboardEntry(models.Model):
+    """Materialized standings row of a user in a contest, updated as verdicts are written"""
+    contest = models.ForeignKey(Contest, on_delete=models.CASCADE, related_name='leaderboard')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='leaderboard_entries')
+    solved_count = models.IntegerField(default=0, help_text="Number of problems solved")
+    score = models.IntegerField(default=0, help_text="Sum of the points of solved problems")
+    penalty = models.IntegerField(default=0, help_text="Penalty time in minutes")
+    last_accepted_at = models.DateTimeField(null=True, blank=True, help_text="Time of the latest first-accepted submission")
+
+    class Meta:
+        unique_together = ['contest', 'user']
+        ordering = ['-score', 'penalty', 'user']
+        indexes = [
+            models.Index(fields=['contest', '-score', 'penalty', 'user'], name='leaderboard_rank_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.contest.title} - {self.user.username} - {self.score} pts"
+
+
+class VerdictEvent(models.Model):
+    """Append-only log of judged verdicts, replayed to rebuild past standings"""
+    contest = models.ForeignKey(Contest, on_delete=models.CASCADE, related_name='verdict_events')
+    submission = models.ForeignKey(Submission, on_delete=models.CASCADE, related_name='verdict_events')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='verdict_events')
+    problem = models.ForeignKey(Problem, on_delete=models.CASCADE, related_name='verdict_events')
+    status = models.CharField(max_length=50, choices=Submission.STATUS_CHOICES)
+    points = models.IntegerField(help_text="Points of the problem when the verdict was written")
+    submitted_at = models.DateTimeField(help_text="Submission time the verdict counts at")
+    recorded_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['submitted_at', 'id']
+        indexes = [
+            models.Index(fields=['contest', 'submitted_at', 'id'], name='verdictevent_contest_time_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.contest.title} - {self.user.username} - {self.status}"
+
+
+class LeaderboardSnapshot(models.Model):
+    """Standings of a contest after replaying its verdict events up to last_event"""
+    contest = models.ForeignKey(Contest, on_delete=models.CASCADE, related_name='leaderboard_snapshots')
+    taken_at = models.DateTimeField(help_text="Submission time of the last event included")
+    last_event = models.ForeignKey(VerdictEvent, on_delete=models.CASCADE, related_name='+')
+    state = models.JSONField(default=dict, help_text="Per-user, per-problem replay state")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-taken_at', '-last_event']
+        indexes = [
+            models.Index(fields=['contest', 'taken_at'], name='snapshot_contest_time_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.contest.title} - {self.taken_at}"
+
+
+class SubmissionRollup(models.Model):
+    """Number of judged submissions per contest, problem, minute, status and language"""
+    contest = models.ForeignKey(Contest, on_delete=models.CASCADE, related_name='submission_rollups')
+    problem = models.ForeignKey(Problem, on_delete=models.CASCADE, related_name='submission_rollups')
+    bucket = models.DateTimeField(help_text="Submission time truncated to the minute (UTC)")
+    status = models.CharField(max_length=50, choices=Submission.STATUS_CHOICES)
+    language_id = models.IntegerField(help_text="Judge0 language ID")
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ['bucket']
+        unique_together = ('contest', 'problem', 'bucket', 'status', 'language_id')
+        indexes = [
+            models.Index(fields=['contest', 'bucket'], name='rollup_contest_bucket_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.problem.title} - {self.bucket} - {self.status}: {self.count}"
+
+
+class PerformanceHistogram(models.Model):
+    """Accepted submissions of a problem and language per runtime or memory bucket"""
+    METRIC_CHOICES = [
+        ('time', 'Runtime (ms)'),
+        ('memory', 'Memory (KB)'),
+    ]
+
+    problem = models.ForeignKey(Problem, on_delete=models.CASCADE, related_name='performance_histograms')
+    language_id = models.IntegerField(help_text="Judge0 language ID")
+    metric = models.CharField(max_length=10, choices=METRIC_CHOICES)
+    bucket = models.IntegerField(help_text="Geometric bucket index, see contest.performance")
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ['problem', 'language_id', 'metric', 'bucket']
+        unique_together = ('problem', 'language_id', 'metric', 'bucket')
+
+    def __str__(self):
+        return f"{self.problem.title} - {self.language_id} - {self.metric}[{self.bucket}]: {self.count}"
+
+
+class ProblemAttemptState(models.Model):
+    """Running summary of one user's submissions to one problem"""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='attempt_states')
+    problem = models.ForeignKey(Problem, on_delete=models.CASCADE, related_name='attempt_states')
+    attempts = models.PositiveIntegerField(default=0, help_text="Submissions made")
+    completed_attempts = models.PositiveIntegerField(default=0, help_text="Submissions that got a verdict other than Internal Error")
+    last_submission = models.ForeignKey(Submission, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    last_status = models.CharField(max_length=50, blank=True)
+    last_submitted_at = models.DateTimeField(null=True, blank=True)
+    first_accepted_at = models.DateTimeField(null=True, blank=True)
+    best_score = models.IntegerField(default=0, help_text="Points earned on the problem")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('user', 'problem')
+
+    def __str__(self):
+        return f"{self.user.username} - {self.problem.title}: {self.attempts} attempts"
+
+
+class CodeSnapshot(models.Model):
+    """
+    One point in a session's code history: a zlib-compressed full copy of the
+    code (keyframe) or a compressed line diff against the previous snapshot
+    """
+    activity = models.ForeignKey(UserActivity, on_delete=models.CASCADE, related_name='code_snapshots')
+    sequence = models.PositiveIntegerField(help_text="Position in the session's history, from 0")
+    taken_at = models.DateTimeField()
+    is_keyframe = models.BooleanField(default=False)
+    payload = models.BinaryField(help_text="Compressed code (keyframe) or diff operations (delta)")
+    code_length = models.IntegerField(help_text="Length of the code after this change")
+
+    class Meta:
+        ordering = ['activity', 'sequence']
+        unique_together = ('activity', 'sequence')
+        indexes = [
+            models.Index(fields=['activity', 'taken_at'], name='codesnapshot_session_time_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.activity_id} #{self.sequence} ({'keyframe' if self.is_keyframe else 'delta'})"
@@ -0,0 +1,158 @@
+"""
+Server-side paste-burst detection from keystroke timing.
+
+The client's ``copy_paste`` events only count pastes it chooses to report.
+This detector instead compares, for every ``code_change`` event of a session,
+how much the code grew since the previous change with how many keystrokes
+were reported in between. A change that adds at least ``MIN_BURST_CHARS``
+characters with fewer than ``MIN_KEYS_PER_CHAR`` keystrokes per character was
+not typed, and is flagged as a paste burst.
+
+All keystroke and code-change events of a contest are loaded once into
+columnar NumPy arrays; running keystroke totals (``np.cumsum``) give the
+keystrokes between any two changes, and inter-key interval statistics come
+from ``np.bincount`` per session, so there is no per-session loop. Findings
+replace the session's earlier ``paste_burst`` entries in
+``UserActivity.suspicious_activities`` and are written with batched updates.
+Compacted sessions are left alone, since their raw events are gone.
+NumPy is imported only when detection runs.
+"""
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+
+from .models import ActivityEvent, UserActivity
+
+MIN_BURST_CHARS = getattr(settings, 'PASTE_BURST_MIN_CHARS', 80)
+MIN_KEYS_PER_CHAR = getattr(settings, 'PASTE_BURST_MIN_KEYS_PER_CHAR', 0.3)
+
+BURST_ACTIVITY_TYPE = 'paste_burst'
+
+
+def _load_events(np, sessions):
+    """(session id, is code change, seconds, keystrokes, code length) columns, by session then time"""
+    events = ActivityEvent.objects.filter(
+        activity__in=sessions,
+        event_type__in=['keystroke', 'code_change']
+    ).order_by('activity_id', 'occurred_at', 'id').values_list(
+        'activity_id', 'event_type', 'occurred_at', 'data__count', 'data__code_length'
+    )
+    activity_ids, is_change, seconds, keys, lengths = [], [], [], [], []
+    for activity_id, event_type, occurred_at, count, code_length in events.iterator(chunk_size=10000):
+        change = event_type == 'code_change'
+        activity_ids.append(activity_id)
+        is_change.append(change)
+        seconds.append(occurred_at.timestamp())
+        keys.append(0 if change else (count if isinstance(count, (int, float)) else 1))
+        lengths.append(code_length if change and isinstance(code_length, (int, float)) else 0)
+    return (
+        np.array(activity_ids, dtype=np.int64),
+        np.array(is_change, dtype=bool),
+        np.array(seconds, dtype=np.float64),
+        np.array(keys, dtype=np.float64),
+        np.array(lengths, dtype=np.float64),
+    )
+
+
+def typing_rates(np, activity_ids, is_change, seconds, keys):
+    """
+    Per session (keyed by position in the sorted unique ids): mean seconds
+    per key between consecutive keystroke batches, and the coefficient of
+    variation of those intervals
+    """
+    sessions, positions = np.unique(activity_ids, return_inverse=True)
+    typed = ~is_change
+    key_positions = positions[typed]
+    same = key_positions[1:] == key_positions[:-1]
+    per_key = np.diff(seconds[typed]) / np.maximum(keys[typed][1:], 1)
+    owner = key_positions[1:][same]
+    intervals = per_key[same]
+
+    count = np.bincount(owner, minlength=len(sessions))
+    total = np.bincount(owner, weights=intervals, minlength=len(sessions))
+    squares = np.bincount(owner, weights=intervals ** 2, minlength=len(sessions))
+    mean = total / np.maximum(count, 1)
+    std = np.sqrt(np.maximum(squares / np.maximum(count, 1) - mean ** 2, 0))
+    return sessions, mean, std / np.maximum(mean, 1e-9)
+
+
+def find_bursts(np, activity_ids, is_change, seconds, keys, lengths):
+    """
+    Index arrays of the flagged code changes: (change event index, chars
+    added, keystrokes since the previous change, seconds since it)
+    """
+    # Keystrokes reported up to and including each event, across all sessions
+    cumulative_keys = np.cumsum(keys)
+
+    changes = np.flatnonzero(is_change)
+    if len(changes) < 2:
+        empty = np.array([], dtype=np.int64)
+        return empty, empty.astype(np.float64), empty.astype(np.float64), empty.astype(np.float64)
+    current, previous = changes[1:], changes[:-1]
+    # The first change of a session has no baseline to compare with
+    same_session = activity_ids[current] == activity_ids[previous]
+
+    added = lengths[current] - lengths[previous]
+    typed = cumulative_keys[current] - cumulative_keys[previous]
+    elapsed = seconds[current] - seconds[previous]
+    flagged = same_session & (added >= MIN_BURST_CHARS) & (typed < added * MIN_KEYS_PER_CHAR)
+    return current[flagged], added[flagged], typed[flagged], elapsed[flagged]
+
+
+def _sessions_with_bursts(sessions):
+    """Sessions that may hold earlier paste-burst findings"""
+    if connection.features.supports_json_field_contains:
+        return sessions.filter(suspicious_activities__contains=[{'type': BURST_ACTIVITY_TYPE}])
+    # Without JSON containment lookups (SQLite), check every session with findings
+    return sessions.exclude(suspicious_activities=[])
+
+
+def detect_contest_bursts(contest):
+    """
+    Detect paste bursts in every session of the contest and record them in
+    ``suspicious_activities``. Returns (sessions flagged, bursts found).
+    Compacted sessions no longer have their keystroke events, so they are
+    skipped and keep the findings recorded before compaction.
+    """
+    import numpy as np
+
+    sessions = UserActivity.objects.filter(problem__contest=contest, compacted_at__isnull=True)
+    activity_ids, is_change, seconds, keys, lengths = _load_events(np, sessions)
+
+    findings = {}
+    if len(activity_ids):
+        session_ids, mean_interval, variation = typing_rates(np, activity_ids, is_change, seconds, keys)
+        indexes, added, typed, elapsed = find_bursts(np, activity_ids, is_change, seconds, keys, lengths)
+        owners = np.searchsorted(session_ids, activity_ids[indexes])
+        detected_at = timezone.now().isoformat()
+        for index, owner, chars, keystrokes, window in zip(indexes, owners, added, typed, elapsed):
+            findings.setdefault(int(session_ids[owner]), []).append({
+                'type': BURST_ACTIVITY_TYPE,
+                'timestamp': datetime.fromtimestamp(float(seconds[index]), tz=dt_timezone.utc).isoformat(),
+                'detected_at': detected_at,
+                'chars_added': int(chars),
+                'keystrokes': int(keystrokes),
+                'window_seconds': round(float(window), 3),
+                'session_seconds_per_key': round(float(mean_interval[owner]), 4),
+                'session_interval_variation': round(float(variation[owner]), 4),
+            })
+
+    # Sessions with new findings, and those whose earlier findings no longer hold
+    stale = set(_sessions_with_bursts(sessions).values_list('id', flat=True))
+    activities = list(
+        UserActivity.objects.filter(id__in=stale | set(findings)).only('id', 'suspicious_activities')
+    )
+    changed = []
+    for activity in activities:
+        kept = [
+            entry for entry in activity.suspicious_activities
+            if not (isinstance(entry, dict) and entry.get('type') == BURST_ACTIVITY_TYPE)
+        ]
+        if len(kept) == len(activity.suspicious_activities) and activity.id not in findings:
+            continue
+        activity.suspicious_activities = kept + findings.get(activity.id, [])
+        changed.append(activity)
+    UserActivity.objects.bulk_update(changed, ['suspicious_activities'], batch_size=500)
+    return len(findings), sum(len(bursts) for bursts in findings.values())
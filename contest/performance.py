@@ -0,0 +1,130 @@
+"""
+Runtime and memory distributions of accepted submissions.
+
+Each problem and language keeps a histogram of accepted runtimes (ms) and
+memory use (KB) in ``PerformanceHistogram`` rows. Buckets are geometric with
+ratio ``BUCKET_RATIO``, so a bucket spans about 5% of its value and a few
+hundred buckets cover everything from 1 ms to minutes. Histograms are
+updated as verdicts are written; where a submission ranks is then one
+aggregate over a bounded number of rows, whatever the number of submissions.
+"""
+import math
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import F, Q, Sum
+
+from .models import PerformanceHistogram, Submission
+
+BUCKET_RATIO = 1.05
+
+METRICS = ('time', 'memory')
+
+
+def metric_value(metric, time=None, memory=None):
+    """Runtime in milliseconds or memory in KB, or None if it was not measured"""
+    # Judge0 reports runtimes as strings, which stay on the instance after save
+    if metric == 'time':
+        return None if time is None else float(time) * 1000
+    return None if memory is None else float(memory)
+
+
+def bucket_of(value):
+    if value <= 1:
+        return 0
+    return math.ceil(math.log(value) / math.log(BUCKET_RATIO))
+
+
+def bucket_bounds(bucket):
+    """Lower (exclusive) and upper (inclusive) value of a bucket"""
+    if bucket == 0:
+        return 0, 1
+    return BUCKET_RATIO ** (bucket - 1), BUCKET_RATIO ** bucket
+
+
+def record_performance(submission):
+    """Count a freshly accepted submission in its problem's histograms"""
+    if submission.status != 'Accepted':
+        return
+
+    for metric in METRICS:
+        value = metric_value(metric, submission.time, submission.memory)
+        if value is None:
+            continue
+        with transaction.atomic():
+            row, created = PerformanceHistogram.objects.get_or_create(
+                problem_id=submission.problem_id,
+                language_id=submission.language_id,
+                metric=metric,
+                bucket=bucket_of(value),
+                defaults={'count': 1}
+            )
+            if not created:
+                PerformanceHistogram.objects.filter(pk=row.pk).update(count=F('count') + 1)
+
+
+def rebuild_histograms(problem):
+    """Recompute a problem's histograms in one pass over its accepted submissions"""
+    counts = Counter()
+    accepted = Submission.objects.filter(
+        problem=problem, status='Accepted'
+    ).values_list('language_id', 'time', 'memory')
+    for language_id, time, memory in accepted.iterator(chunk_size=5000):
+        for metric in METRICS:
+            value = metric_value(metric, time, memory)
+            if value is not None:
+                counts[language_id, metric, bucket_of(value)] += 1
+
+    with transaction.atomic():
+        PerformanceHistogram.objects.filter(problem=problem).delete()
+        PerformanceHistogram.objects.bulk_create([
+            PerformanceHistogram(
+                problem=problem, language_id=language_id, metric=metric, bucket=bucket, count=count
+            )
+            for (language_id, metric, bucket), count in counts.items()
+        ], batch_size=1000)
+
+
+def percentile_rank(problem_id, language_id, metric, value):
+    """
+    Percentage of accepted submissions of the problem and language that used
+    more of ``metric`` than ``value`` (ties in the same bucket count half).
+    Returns None if there are no accepted submissions to compare with.
+    """
+    bucket = bucket_of(value)
+    totals = PerformanceHistogram.objects.filter(
+        problem_id=problem_id, language_id=language_id, metric=metric
+    ).aggregate(
+        total=Sum('count'),
+        worse=Sum('count', filter=Q(bucket__gt=bucket)),
+        same=Sum('count', filter=Q(bucket=bucket))
+    )
+    if not totals['total']:
+        return None
+    beaten = (totals['worse'] or 0) + (totals['same'] or 0) / 2
+    return round(100 * beaten / totals['total'], 2)
+
+
+def histogram(problem_id, language_id, metric, quantiles=(50, 90, 99)):
+    """Buckets of a histogram with their bounds, plus the requested percentiles"""
+    rows = list(PerformanceHistogram.objects.filter(
+        problem_id=problem_id, language_id=language_id, metric=metric
+    ).order_by('bucket').values_list('bucket', 'count'))
+    total = sum(count for _, count in rows)
+
+    buckets = []
+    for bucket, count in rows:
+        lower, upper = bucket_bounds(bucket)
+        buckets.append({'lower': round(lower, 3), 'upper': round(upper, 3), 'count': count})
+
+    # A percentile is reported as the upper bound of the bucket that reaches it
+    percentiles = {}
+    for quantile in quantiles:
+        target = total * quantile / 100
+        seen = 0
+        for bucket in buckets:
+            seen += bucket['count']
+            if seen >= target:
+                percentiles[f'p{quantile}'] = bucket['upper']
+                break
+    return {'total': total, 'buckets': buckets, 'percentiles': percentiles}
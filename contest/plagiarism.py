@@ -0,0 +1,405 @@
+"""
+Similarity fingerprints used by the plagiarism subsystem.
+
+Submissions are reduced to a MinHash signature over token shingles of their
+normalized source, where identifiers other than keywords and common builtins
+become ``ID`` and literals become ``NUM``/``STR``, so renamed copies shingle
+the same. Signatures are split into LSH bands; two submissions that
+share any band bucket are candidate near-duplicates, so a lookup against the
+whole archive only touches the handful of rows that collide with it.
+
+Python submissions additionally get a multiset of normalized AST subtree
+hashes, which is insensitive to renamed variables and reordered functions
+but keeps the attribute, builtin and library names a program calls.
+"""
+import ast
+import builtins
+import difflib
+import hashlib
+import keyword
+import random
+import re
+
+from django.conf import settings
+from django.db import transaction
+
+from .models import (
+    Submission, SubmissionFingerprint, LSHBucket, PlagiarismCheck,
+    PlagiarismCluster, PlagiarismClusterMember
+)
+from .utils import UnionFind
+
+# 128 permutations split into 32 bands of 4 rows: pairs with a Jaccard
+# similarity above ~0.42 are very likely to share at least one bucket.
+MINHASH_PERMUTATIONS = 128
+LSH_BANDS = 32
+LSH_ROWS = MINHASH_PERMUTATIONS // LSH_BANDS
+SHINGLE_SIZE = 5
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+_rng = random.Random(0x5EED)
+_PERMUTATIONS = [
+    (_rng.randrange(1, _MERSENNE_PRIME), _rng.randrange(0, _MERSENNE_PRIME))
+    for _ in range(MINHASH_PERMUTATIONS)
+]
+
+# String literals, numbers, words and single punctuation characters
+_TOKEN_RE = re.compile(r'"(?:\\.|[^"\\\n])*"|\'(?:\\.|[^\'\\\n])*\'|\d[\w.]*|\w+|[^\w\s]')
+
+# Words kept as they are in shingles: keywords, Python builtins and the
+# standard I/O names of the other languages we judge. Any other identifier is
+# a name the author chose and is shingled as ID.
+_RESERVED_WORDS = frozenset(keyword.kwlist) | frozenset(dir(builtins)) | frozenset('''
+    auto bool boolean break case catch char class const continue default
+    define delete do double else enum extends final float for function if
+    implements include int let long namespace new null nullptr private
+    protected public return short signed sizeof static std struct switch
+    template this throw try typedef typename unsigned using var void volatile
+    while cin cout endl printf scanf puts gets malloc String System println
+    Scanner nextInt nextLine Integer Math console
+'''.split())
+
+# Judge0 language IDs of the Python versions we accept
+PYTHON_LANGUAGE_IDS = {70, 71, 92, 100, 109}
+
+# Subtrees smaller than this (single names, constants, ...) are too common to
+# say anything about copying and are left out of the multiset.
+MIN_SUBTREE_SIZE = 4
+
+# Submissions whose code_similarity_score reaches this are counted as
+# high-similarity in analytics
+HIGH_SIMILARITY_THRESHOLD = getattr(settings, 'PLAGIARISM_HIGH_SIMILARITY_THRESHOLD', 0.8)
+
+ALGORITHM_AST = 'ast_subtree'
+ALGORITHM_DIFFLIB = 'difflib'
+
+
+def normalize_code(code):
+    """Strip blank lines, surrounding whitespace and full-line comments"""
+    lines = (code or '').strip().split('\n')
+    normalized = []
+    for line in lines:
+        line = line.strip()
+        if line and not line.startswith('#') and not line.startswith('//'):
+            normalized.append(line)
+    return '\n'.join(normalized)
+
+
+def _hash64(text):
+    return int.from_bytes(hashlib.blake2b(text.encode('utf-8'), digest_size=8).digest(), 'big')
+
+
+def _normalize_token(token):
+    if token[0] in '"\'':
+        return 'STR'
+    if token[0].isdigit():
+        return 'NUM'
+    if token[0].isalpha() or token[0] == '_':
+        return token if token in _RESERVED_WORDS else 'ID'
+    return token
+
+
+def code_tokens(code):
+    """Tokens of the normalized code with identifiers and literals anonymized"""
+    return [_normalize_token(token) for token in _TOKEN_RE.findall(normalize_code(code))]
+
+
+def shingle_hashes(code):
+    """Hash every run of SHINGLE_SIZE consecutive tokens in the normalized code"""
+    tokens = code_tokens(code)
+    if not tokens:
+        return set()
+    if len(tokens) < SHINGLE_SIZE:
+        return {_hash64(' '.join(tokens))}
+    return {
+        _hash64(' '.join(tokens[i:i + SHINGLE_SIZE]))
+        for i in range(len(tokens) - SHINGLE_SIZE + 1)
+    }
+
+
+def minhash_signature(code):
+    """Compute the MinHash signature of a piece of source code"""
+    hashes = shingle_hashes(code)
+    if not hashes:
+        return [_MAX_HASH] * MINHASH_PERMUTATIONS
+    return [
+        min(((a * h + b) % _MERSENNE_PRIME) & _MAX_HASH for h in hashes)
+        for a, b in _PERMUTATIONS
+    ]
+
+
+def band_keys(signature):
+    """Split a signature into LSH band bucket keys"""
+    keys = []
+    for band in range(LSH_BANDS):
+        rows = signature[band * LSH_ROWS:(band + 1) * LSH_ROWS]
+        digest = hashlib.blake2b(repr(rows).encode('ascii'), digest_size=8).hexdigest()
+        keys.append(f'{band}:{digest}')
+    return keys
+
+
+def estimate_similarity(signature1, signature2):
+    """Estimate the Jaccard similarity of two signatures (0-1)"""
+    if not signature1 or len(signature1) != len(signature2):
+        return 0.0
+    matches = sum(1 for x, y in zip(signature1, signature2) if x == y)
+    return matches / len(signature1)
+
+
+def _bound_names(tree):
+    """Names the code binds itself: variables, parameters, functions, classes and import aliases"""
+    names = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Name) and isinstance(node.ctx, (ast.Store, ast.Del)):
+            names.add(node.id)
+        elif isinstance(node, ast.arg):
+            names.add(node.arg)
+        elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            names.add(node.name)
+        elif isinstance(node, ast.ExceptHandler) and node.name:
+            names.add(node.name)
+        elif isinstance(node, ast.alias) and node.asname:
+            names.add(node.asname)
+    return names
+
+
+def _node_label(node, bound):
+    """Node type plus the identifiers that are not the author's own choice"""
+    label = type(node).__name__
+    if isinstance(node, ast.Constant):
+        # Keep the literal's type but not its value
+        return f'{label}:{type(node.value).__name__}'
+    if isinstance(node, ast.Name) and node.id not in bound:
+        # Builtins and imported names (len, sorted, math, ...)
+        return f'{label}:{node.id}'
+    if isinstance(node, ast.Attribute):
+        return f'{label}:{node.attr}'
+    if isinstance(node, ast.keyword) and node.arg not in bound:
+        return f'{label}:{node.arg}'
+    if isinstance(node, ast.alias):
+        return f'{label}:{node.name}'
+    if isinstance(node, ast.ImportFrom):
+        return f'{label}:{node.module}'
+    return label
+
+
+def _subtree_hash(node, bound, counts):
+    """Hash a normalized subtree bottom-up, recording every large enough subtree"""
+    label = _node_label(node, bound)
+
+    child_hashes = []
+    size = 1
+    for child in ast.iter_child_nodes(node):
+        if isinstance(child, ast.expr_context):
+            continue
+        child_hash, child_size = _subtree_hash(child, bound, counts)
+        child_hashes.append(child_hash)
+        size += child_size
+
+    digest = hashlib.blake2b(
+        '|'.join([label] + child_hashes).encode('utf-8'), digest_size=8
+    ).hexdigest()
+    if size >= MIN_SUBTREE_SIZE:
+        counts[digest] = counts.get(digest, 0) + 1
+    return digest, size
+
+
+def ast_subtree_hashes(code):
+    """
+    Multiset of normalized AST subtree hashes of Python source, as
+    {hash: count}. Names the code binds itself are anonymized; attribute,
+    builtin and imported names are kept, so ``x.append(y)`` and
+    ``x.pop(y)`` differ. Returns an empty dict if the code does not parse.
+    """
+    try:
+        tree = ast.parse(code or '')
+    except (SyntaxError, ValueError):
+        return {}
+
+    counts = {}
+    try:
+        _subtree_hash(tree, _bound_names(tree), counts)
+    except RecursionError:
+        return {}
+    return counts
+
+
+def ast_similarity(hashes1, hashes2):
+    """Dice coefficient of two subtree hash multisets (0-1)"""
+    total = sum(hashes1.values()) + sum(hashes2.values())
+    if not total:
+        return 0.0
+    if len(hashes1) > len(hashes2):
+        hashes1, hashes2 = hashes2, hashes1
+    shared = sum(min(count, hashes2.get(digest, 0)) for digest, count in hashes1.items())
+    return 2.0 * shared / total
+
+
+def text_similarity(code1, code2):
+    """Character-level similarity of the normalized sources (0-1)"""
+    return difflib.SequenceMatcher(None, normalize_code(code1), normalize_code(code2)).ratio()
+
+
+def is_python(submission):
+    return submission.language_id in PYTHON_LANGUAGE_IDS
+
+
+def compare_submissions(submission1, fingerprint1, submission2, fingerprint2):
+    """
+    Compare two submissions with the best algorithm available for them.
+    Returns (algorithm, similarity) with similarity in the 0-1 range.
+    """
+    if fingerprint1.ast_hashes and fingerprint2.ast_hashes:
+        return ALGORITHM_AST, ast_similarity(fingerprint1.ast_hashes, fingerprint2.ast_hashes)
+    return ALGORITHM_DIFFLIB, text_similarity(submission1.source_code, submission2.source_code)
+
+
+def index_submission(submission):
+    """
+    Store the MinHash signature, LSH buckets and (for Python) AST subtree
+    hashes of a submission. Returns the existing fingerprint if the
+    submission is already indexed, filling in AST hashes it predates.
+    """
+    fingerprint = SubmissionFingerprint.objects.filter(submission=submission).first()
+    if fingerprint is not None:
+        if fingerprint.ast_hashes is None and is_python(submission):
+            fingerprint.ast_hashes = ast_subtree_hashes(submission.source_code)
+            fingerprint.save(update_fields=['ast_hashes'])
+        return fingerprint
+
+    signature = minhash_signature(submission.source_code)
+    ast_hashes = ast_subtree_hashes(submission.source_code) if is_python(submission) else None
+    with transaction.atomic():
+        fingerprint, created = SubmissionFingerprint.objects.get_or_create(
+            submission=submission,
+            defaults={'minhash': signature, 'ast_hashes': ast_hashes}
+        )
+        if created:
+            LSHBucket.objects.bulk_create([
+                LSHBucket(key=key, submission=submission, problem_id=submission.problem_id)
+                for key in band_keys(signature)
+            ])
+    return fingerprint
+
+
+def submission_signature(submission):
+    """MinHash signature of a submission: the indexed one if any, else computed without storing it"""
+    signature = SubmissionFingerprint.objects.filter(
+        submission=submission
+    ).values_list('minhash', flat=True).first()
+    return signature if signature is not None else minhash_signature(submission.source_code)
+
+
+def update_similarity_score(submission, fingerprint):
+    """
+    Store the highest similarity (0-1) between a submission and the earlier
+    submissions of other users to the same problem. Candidates come from the
+    (problem, key) LSH index, so only colliding submissions are compared.
+    """
+    candidate_ids = LSHBucket.objects.filter(
+        problem_id=submission.problem_id,
+        key__in=band_keys(fingerprint.minhash)
+    ).values('submission_id')
+    candidates = SubmissionFingerprint.objects.filter(
+        submission_id__in=candidate_ids,
+        submission__submitted_at__lt=submission.submitted_at
+    ).exclude(
+        submission__user_id=submission.user_id
+    ).only('minhash', 'ast_hashes')
+
+    score = 0.0
+    for candidate in candidates:
+        if fingerprint.ast_hashes and candidate.ast_hashes:
+            similarity = ast_similarity(fingerprint.ast_hashes, candidate.ast_hashes)
+        else:
+            similarity = estimate_similarity(fingerprint.minhash, candidate.minhash)
+        score = max(score, similarity)
+
+    submission.code_similarity_score = round(score, 3)
+    Submission.objects.filter(pk=submission.pk).update(
+        code_similarity_score=submission.code_similarity_score
+    )
+    return submission.code_similarity_score
+
+
+def find_near_duplicates(signature, threshold=0.5, limit=50, exclude_submission_id=None):
+    """
+    Look up archived submissions whose signature is close to the given one.
+    Only submissions sharing at least one LSH bucket are scored.
+    """
+    candidate_ids = LSHBucket.objects.filter(
+        key__in=band_keys(signature)
+    ).values('submission_id')
+    candidates = SubmissionFingerprint.objects.filter(
+        submission_id__in=candidate_ids
+    ).select_related('submission__user', 'submission__problem__contest')
+    if exclude_submission_id is not None:
+        candidates = candidates.exclude(submission_id=exclude_submission_id)
+
+    matches = []
+    for fingerprint in candidates:
+        similarity = estimate_similarity(signature, fingerprint.minhash)
+        if similarity >= threshold:
+            matches.append((similarity, fingerprint.submission))
+
+    matches.sort(key=lambda match: match[0], reverse=True)
+    return matches[:limit]
+
+
+def unindexed_accepted_submissions():
+    """Accepted submissions that do not have a fingerprint yet"""
+    return Submission.objects.filter(status='Accepted', fingerprint__isnull=True)
+
+
+def build_clusters(contest, threshold):
+    """
+    Group the contest's submissions into clusters connected by plagiarism
+    checks at or above ``threshold`` (percentage). The pair table is read
+    once with union-find; previously stored clusters are replaced.
+    """
+    pairs = PlagiarismCheck.objects.filter(
+        submission1__problem__contest=contest,
+        similarity_score__gte=threshold
+    ).values_list(
+        'submission1_id', 'submission1__user_id',
+        'submission2_id', 'submission2__user_id',
+        'similarity_score'
+    )
+
+    forest = UnionFind()
+    best = {}
+    user_ids = {}
+    for submission1_id, user1_id, submission2_id, user2_id, similarity in pairs.iterator(chunk_size=5000):
+        forest.union(submission1_id, submission2_id)
+        user_ids[submission1_id] = user1_id
+        user_ids[submission2_id] = user2_id
+        for submission_id in (submission1_id, submission2_id):
+            if similarity > best.get(submission_id, -1):
+                best[submission_id] = similarity
+
+    groups = list(forest.groups().values())
+
+    with transaction.atomic():
+        PlagiarismCluster.objects.filter(contest=contest).delete()
+        clusters = PlagiarismCluster.objects.bulk_create([
+            PlagiarismCluster(
+                contest=contest,
+                threshold=threshold,
+                max_similarity=max(best[submission_id] for submission_id in members),
+                size=len(members)
+            )
+            for members in groups
+        ])
+        PlagiarismClusterMember.objects.bulk_create([
+            PlagiarismClusterMember(
+                cluster=cluster,
+                submission_id=submission_id,
+                user_id=user_ids[submission_id],
+                max_similarity=best[submission_id]
+            )
+            for cluster, members in zip(clusters, groups)
+            for submission_id in members
+        ], batch_size=1000)
+    return clusters
@@ -0,0 +1,299 @@
+"""
+Real-time proctoring feed.
+
+Verdicts and flagged telemetry events of a contest are pushed to every proctor
+watching it as Server-Sent Events, served straight from the ASGI app (see
+``core/asgi.py``) so an open stream never ties up a Django worker thread.
+
+Events are published after the writing transaction commits, formatted once,
+and handed to the backend named by ``PROCTORING_BACKEND``:
+
+- ``LocalBackend`` (default) dispatches to the in-process ``BroadcastHub``,
+  which fans each event out to the queue of every connected stream.
+- ``RedisBackend`` publishes through Redis pub/sub so proctors connected to
+  any process receive events raised in any other; each process relays the
+  channel into its own hub. It needs the ``redis`` package.
+
+Each stream has a bounded queue: a proctor that falls behind loses its oldest
+events rather than holding memory or slowing publishers down.
+"""
+import asyncio
+import json
+import logging
+import threading
+from urllib.parse import parse_qs
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils.module_loading import import_string
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+
+from .models import Contest
+from .rollups import PENDING_STATUSES
+
+logger = logging.getLogger('contest.realtime')
+
+QUEUE_SIZE = getattr(settings, 'PROCTORING_QUEUE_SIZE', 1000)
+HEARTBEAT_SECONDS = getattr(settings, 'PROCTORING_HEARTBEAT_SECONDS', 15)
+
+
+class Subscription:
+    """One connected stream: a bounded queue on the stream's event loop"""
+
+    def __init__(self, contest_id, loop):
+        self.contest_id = contest_id
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+        self.dropped = 0
+
+    def _put(self, frame):
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(frame)
+
+    def deliver(self, frame):
+        """Queue a frame; safe to call from any thread"""
+        try:
+            self.loop.call_soon_threadsafe(self._put, frame)
+        except RuntimeError:
+            # The stream's loop has closed; it unsubscribes on its way out
+            pass
+
+
+class BroadcastHub:
+    """In-process fan-out of contest events to the subscribed streams"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscriptions = {}
+
+    def subscribe(self, contest_id):
+        subscription = Subscription(contest_id, asyncio.get_running_loop())
+        with self._lock:
+            self._subscriptions.setdefault(contest_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.contest_id)
+            if subscriptions:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._subscriptions[subscription.contest_id]
+
+    def subscriber_count(self, contest_id):
+        with self._lock:
+            return len(self._subscriptions.get(contest_id, ()))
+
+    def dispatch(self, contest_id, frame):
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(contest_id, ()))
+        for subscription in subscriptions:
+            subscription.deliver(frame)
+
+
+class LocalBackend:
+    """Single process: events go straight to this process's hub"""
+
+    def __init__(self, hub):
+        self.hub = hub
+
+    def start(self):
+        pass
+
+    def publish(self, contest_id, frame):
+        self.hub.dispatch(contest_id, frame)
+
+
+class RedisBackend:
+    """Across processes: events travel over Redis pub/sub to every process's hub"""
+    channel_prefix = 'proctoring:'
+
+    def __init__(self, hub):
+        import redis
+
+        self.hub = hub
+        self.client = redis.Redis.from_url(
+            getattr(settings, 'PROCTORING_REDIS_URL', 'redis://localhost:6379/0')
+        )
+        self._lock = threading.Lock()
+        self._listener = None
+
+    def start(self):
+        """Relay the Redis channels into the hub, from the first stream on"""
+        with self._lock:
+            if self._listener is None:
+                self._listener = threading.Thread(target=self._listen, name='proctoring-relay', daemon=True)
+                self._listener.start()
+
+    def _listen(self):
+        pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+        pubsub.psubscribe(f'{self.channel_prefix}*')
+        for message in pubsub.listen():
+            channel = message['channel'].decode()
+            self.hub.dispatch(int(channel[len(self.channel_prefix):]), message['data'].decode())
+
+    def publish(self, contest_id, frame):
+        self.client.publish(f'{self.channel_prefix}{contest_id}', frame)
+
+
+hub = BroadcastHub()
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_backend():
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            backend_class = import_string(
+                getattr(settings, 'PROCTORING_BACKEND', 'contest.realtime.LocalBackend')
+            )
+            _backend = backend_class(hub)
+        return _backend
+
+
+def format_event(event_type, payload):
+    """Server-Sent Events frame"""
+    return f'event: {event_type}\ndata: {json.dumps(payload, cls=DjangoJSONEncoder)}\n\n'
+
+
+def _send(contest_id, frame):
+    # The feed is best effort: a broken backend must never fail a write
+    try:
+        get_backend().publish(contest_id, frame)
+    except Exception:
+        logger.exception('Could not publish proctoring event for contest %s', contest_id)
+
+
+def publish(contest_id, event_type, payload):
+    """Send an event to the contest's proctors once the current transaction commits"""
+    frame = format_event(event_type, payload)
+    transaction.on_commit(lambda: _send(contest_id, frame))
+
+
+def publish_verdict(submission):
+    """Send a final verdict; queued and processing statuses are not verdicts yet"""
+    if submission.status in PENDING_STATUSES:
+        return
+    publish(submission.problem.contest_id, 'verdict', {
+        'submission_id': submission.id,
+        'user_id': submission.user_id,
+        'problem_id': submission.problem_id,
+        'language_id': submission.language_id,
+        'status': submission.status,
+        'submitted_at': submission.submitted_at,
+    })
+
+
+def publish_flagged_events(activity, problem, events):
+    """Send the flagged events of an ingested telemetry batch, as one feed event"""
+    if not events:
+        return
+    publish(problem.contest_id, 'suspicious_activity', {
+        'activity_id': activity.id,
+        'user_id': activity.user_id,
+        'problem_id': problem.id,
+        'events': [
+            {
+                'type': event['event_type'],
+                'timestamp': event['occurred_at'],
+                'data': event.get('data') or {},
+            }
+            for event in events
+        ],
+    })
+
+
+# ASGI stream
+
+def _authenticate(token):
+    """Admin user of a JWT access token, or None with the HTTP status to answer"""
+    if not token:
+        return None, 401
+    authentication = JWTAuthentication()
+    try:
+        user = authentication.get_user(authentication.get_validated_token(token))
+    except (InvalidToken, AuthenticationFailed):
+        return None, 401
+    if getattr(user, 'role', None) != 'ADMIN':
+        return None, 403
+    return user, None
+
+
+def _contest_exists(contest_id):
+    return Contest.objects.filter(id=contest_id).exists()
+
+
+async def _respond(send, status, message):
+    body = json.dumps({'error': message}).encode()
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [(b'content-type', b'application/json'), (b'access-control-allow-origin', b'*')],
+    })
+    await send({'type': 'http.response.body', 'body': body})
+
+
+async def _wait_for_disconnect(receive):
+    while (await receive())['type'] != 'http.disconnect':
+        pass
+
+
+async def proctoring_stream(scope, receive, send, contest_id):
+    """
+    ASGI handler of GET /api/proctoring/contests/<id>/stream/?token=<JWT>.
+    Browsers' EventSource cannot set headers, so the access token comes in
+    the query string.
+    """
+    if scope['method'] != 'GET':
+        await _respond(send, 405, 'Method not allowed')
+        return
+
+    token = parse_qs(scope.get('query_string', b'').decode()).get('token', [None])[0]
+    user, error = await sync_to_async(_authenticate)(token)
+    if error:
+        await _respond(send, error, 'Authentication required' if error == 401 else 'Admin access required')
+        return
+    if not await sync_to_async(_contest_exists)(contest_id):
+        await _respond(send, 404, 'Contest not found')
+        return
+
+    get_backend().start()
+    subscription = hub.subscribe(contest_id)
+    disconnect = asyncio.ensure_future(_wait_for_disconnect(receive))
+    try:
+        await send({
+            'type': 'http.response.start',
+            'status': 200,
+            'headers': [
+                (b'content-type', b'text/event-stream'),
+                (b'cache-control', b'no-cache'),
+                (b'x-accel-buffering', b'no'),
+                (b'access-control-allow-origin', b'*'),
+            ],
+        })
+        await send({'type': 'http.response.body', 'body': b'retry: 3000\n\n', 'more_body': True})
+
+        while True:
+            next_frame = asyncio.ensure_future(subscription.queue.get())
+            done, _ = await asyncio.wait(
+                {next_frame, disconnect}, timeout=HEARTBEAT_SECONDS, return_when=asyncio.FIRST_COMPLETED
+            )
+            if disconnect in done:
+                next_frame.cancel()
+                break
+            if next_frame in done:
+                frame = next_frame.result()
+            else:
+                # Keeps proxies from closing an idle stream
+                next_frame.cancel()
+                frame = ': keepalive\n\n'
+            await send({'type': 'http.response.body', 'body': frame.encode(), 'more_body': True})
+    finally:
+        hub.unsubscribe(subscription)
+        disconnect.cancel()
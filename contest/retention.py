@@ -0,0 +1,229 @@
+"""
+Retention and compaction of session telemetry.
+
+Once a contest has been over for ``RETENTION_DAYS``, its sessions' raw
+``ActivityEvent`` rows are downsampled into ``UserActivity.telemetry_summary``
+(event counts per type and per minute). The raw rows are then deleted, except
+flagged events (``KEPT_EVENT_TYPES``), which stay as evidence. The bulky JSON
+history fields are cleared as well. The ``CodeSnapshot`` code history is not
+pruned: it is already delta-compressed and session replay rebuilds the code
+from it. Deletes run in short chunks of ``CHUNK_SIZE`` rows, each in its own
+transaction, so the event table is never locked for long.
+
+Compaction is restartable: sessions are summarized and stamped with
+``compacted_at`` in one transaction, and the chunked deletes only touch events
+received up to that stamp. Events that reach a session after it was compacted
+are merged into its summary, and the session restamped, on the next pass.
+"""
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Exists, F, OuterRef, Q, Sum, TextField
+from django.db.models.functions import Cast, Coalesce, Length, TruncMinute
+from django.utils import timezone
+
+from .models import ActivityEvent, Contest, UserActivity
+from .paste_detection import detect_contest_bursts
+from .scoring import numpy_available, score_contest_sessions
+from .telemetry import FLAGGED_EVENT_TYPES
+
+RETENTION_DAYS = getattr(settings, 'ACTIVITY_RETENTION_DAYS', 7)
+CHUNK_SIZE = getattr(settings, 'ACTIVITY_COMPACTION_CHUNK_SIZE', 5000)
+
+# Event types kept after compaction
+KEPT_EVENT_TYPES = FLAGGED_EVENT_TYPES
+
+# Rough per-row cost of an event besides its payload: key, foreign key,
+# type, two timestamps and the row header
+EVENT_ROW_OVERHEAD_BYTES = 64
+
+
+def expired_contests(now=None, retention_days=RETENTION_DAYS):
+    """Contests that ended more than ``retention_days`` ago and still have telemetry to compact"""
+    now = now or timezone.now()
+    pending_sessions = UserActivity.objects.filter(
+        problem__contest=OuterRef('pk'), compacted_at__isnull=True
+    )
+    pending_events = ActivityEvent.objects.filter(
+        Q(received_at__gt=F('activity__compacted_at')) | ~Q(event_type__in=KEPT_EVENT_TYPES),
+        activity__problem__contest=OuterRef('pk'),
+        activity__compacted_at__isnull=False
+    )
+    return Contest.objects.filter(
+        Q(Exists(pending_sessions)) | Q(Exists(pending_events)),
+        end_time__lte=now - timedelta(days=retention_days)
+    )
+
+
+def _json_bytes(field):
+    return Coalesce(Sum(Length(Cast(field, TextField()))), 0)
+
+
+def _summaries(events):
+    """telemetry_summary of each session (by id), from the given raw events"""
+    rows = events.annotate(
+        minute=TruncMinute('occurred_at')
+    ).values('activity_id', 'event_type', 'minute').annotate(count=Count('id')).order_by()
+
+    summaries = {}
+    for row in rows.iterator(chunk_size=10000):
+        summary = summaries.setdefault(row['activity_id'], {'events': Counter(), 'minutes': {}})
+        summary['events'][row['event_type']] += row['count']
+        minute = summary['minutes'].setdefault(row['minute'].isoformat(), {})
+        minute[row['event_type']] = minute.get(row['event_type'], 0) + row['count']
+    return summaries
+
+
+def _merge(summary, new):
+    """Add freshly summarized counts to a session's existing summary"""
+    events = Counter(summary.get('events', {}))
+    events.update(new['events'])
+    minutes = {key: dict(counts) for key, counts in summary.get('minutes', {}).items()}
+    for key, counts in new['minutes'].items():
+        minute = minutes.setdefault(key, {})
+        for event_type, count in counts.items():
+            minute[event_type] = minute.get(event_type, 0) + count
+    return {'events': dict(events), 'minutes': dict(sorted(minutes.items()))}
+
+
+def summarize_sessions(contest):
+    """
+    Store the telemetry summary of every session of the contest not yet
+    compacted, clear its JSON history and stamp it. Returns (sessions
+    summarized, bytes of JSON history cleared).
+    """
+    with transaction.atomic():
+        now = timezone.now()
+        sessions = UserActivity.objects.filter(problem__contest=contest, compacted_at__isnull=True)
+        activities = list(sessions.select_for_update().only('id', 'telemetry_summary'))
+        # Events received after ``now`` are late and merged by fold_late_events
+        summaries = _summaries(ActivityEvent.objects.filter(activity__in=sessions, received_at__lte=now))
+        cleared = sessions.aggregate(
+            code_changes=_json_bytes('code_changes'),
+            keystroke_patterns=_json_bytes('keystroke_patterns')
+        )
+
+        for activity in activities:
+            if activity.id in summaries:
+                activity.telemetry_summary = _merge(activity.telemetry_summary, summaries[activity.id])
+            activity.code_changes = []
+            activity.keystroke_patterns = {}
+            activity.compacted_at = now
+        UserActivity.objects.bulk_update(
+            activities,
+            ['telemetry_summary', 'code_changes', 'keystroke_patterns', 'compacted_at'],
+            batch_size=1000
+        )
+    return len(activities), cleared['code_changes'] + cleared['keystroke_patterns']
+
+
+def late_events(contest):
+    """Raw events that reached the contest's sessions after they were compacted"""
+    return ActivityEvent.objects.filter(
+        activity__problem__contest=contest,
+        received_at__gt=F('activity__compacted_at')
+    )
+
+
+def fold_late_events(contest):
+    """
+    Merge the late events of the contest's compacted sessions into their
+    telemetry summaries and restamp the sessions, so the events can be
+    deleted. Returns the number of events merged.
+    """
+    with transaction.atomic():
+        now = timezone.now()
+        # Events received after ``now`` are left for the next pass
+        events = late_events(contest).filter(received_at__lte=now)
+        activities = list(UserActivity.objects.filter(
+            id__in=events.values('activity_id')
+        ).select_for_update().only('id', 'telemetry_summary'))
+        summaries = _summaries(events)
+
+        activities = [activity for activity in activities if activity.id in summaries]
+        for activity in activities:
+            activity.telemetry_summary = _merge(activity.telemetry_summary, summaries[activity.id])
+            activity.compacted_at = now
+        UserActivity.objects.bulk_update(activities, ['telemetry_summary', 'compacted_at'], batch_size=1000)
+    return sum(sum(summaries[activity.id]['events'].values()) for activity in activities)
+
+
+def expired_events(contest):
+    """Raw events of the contest's compacted sessions that compaction deletes"""
+    return ActivityEvent.objects.filter(
+        activity__problem__contest=contest,
+        received_at__lte=F('activity__compacted_at')
+    ).exclude(event_type__in=KEPT_EVENT_TYPES)
+
+
+def delete_expired_events(contest, chunk_size=CHUNK_SIZE):
+    """
+    Delete the expired raw events of the contest in chunks of ``chunk_size``
+    rows, one short transaction each. Returns (rows deleted, estimated bytes).
+    """
+    deleted = reclaimed = 0
+    last_id = 0
+    while True:
+        ids = list(expired_events(contest).filter(
+            id__gt=last_id
+        ).order_by('id').values_list('id', flat=True)[:chunk_size])
+        if not ids:
+            break
+        with transaction.atomic():
+            chunk = ActivityEvent.objects.filter(id__in=ids)
+            payload = chunk.aggregate(bytes=_json_bytes('data'))['bytes']
+            count, _ = chunk.delete()
+        deleted += count
+        reclaimed += payload + count * EVENT_ROW_OVERHEAD_BYTES
+        last_id = ids[-1]
+    return deleted, reclaimed
+
+
+def estimate_compaction(contest):
+    """What compacting the contest would delete, without changing anything"""
+    events = ActivityEvent.objects.filter(activity__problem__contest=contest).exclude(
+        event_type__in=KEPT_EVENT_TYPES
+    )
+    totals = events.aggregate(count=Count('id'), bytes=_json_bytes('data'))
+    cleared = UserActivity.objects.filter(problem__contest=contest, compacted_at__isnull=True).aggregate(
+        sessions=Count('id'),
+        code_changes=_json_bytes('code_changes'),
+        keystroke_patterns=_json_bytes('keystroke_patterns')
+    )
+    return {
+        'sessions': cleared['sessions'],
+        'events_deleted': totals['count'],
+        'bytes_reclaimed': (
+            totals['bytes'] + totals['count'] * EVENT_ROW_OVERHEAD_BYTES
+            + cleared['code_changes'] + cleared['keystroke_patterns']
+        ),
+    }
+
+
+def compact_contest(contest, chunk_size=CHUNK_SIZE):
+    """
+    Score, summarize and prune the telemetry of an ended contest. Returns a
+    report with the sessions summarized, late events merged, events deleted
+    and estimated bytes reclaimed.
+    """
+    # Scoring and paste-burst detection read the raw keystroke events, so
+    # they run on the sessions still to compact before the events go
+    scored = 0
+    if numpy_available() and UserActivity.objects.filter(
+        problem__contest=contest, compacted_at__isnull=True
+    ).exists():
+        detect_contest_bursts(contest)
+        scored = score_contest_sessions(contest)
+
+    sessions, cleared = summarize_sessions(contest)
+    folded = fold_late_events(contest)
+    deleted, reclaimed = delete_expired_events(contest, chunk_size)
+    return {
+        'sessions_scored': scored,
+        'sessions': sessions,
+        'events_folded': folded,
+        'events_deleted': deleted,
+        'bytes_reclaimed': cleared + reclaimed,
+    }
@@ -0,0 +1,96 @@
+"""
+Per-minute submission counts for dashboards.
+
+``SubmissionRollup`` rows count the judged submissions of each contest by
+problem, minute, status and language. They are incremented whenever a final
+verdict is written, so charts of submissions over time or acceptance by
+problem read a few hundred rollup rows instead of scanning submissions.
+"""
+from datetime import timedelta, timezone as dt_timezone
+
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import TruncMinute
+
+from .models import Submission, SubmissionRollup
+
+# Statuses that are not a verdict yet; they are polled and saved repeatedly
+PENDING_STATUSES = ['In Queue', 'Processing']
+
+
+def minute_bucket(moment):
+    return moment.astimezone(dt_timezone.utc).replace(second=0, microsecond=0)
+
+
+def update_rollup(submission):
+    """Count a freshly written final verdict in its rollup bucket"""
+    if submission.status in PENDING_STATUSES:
+        return
+
+    with transaction.atomic():
+        rollup, created = SubmissionRollup.objects.get_or_create(
+            contest_id=submission.problem.contest_id,
+            problem_id=submission.problem_id,
+            bucket=minute_bucket(submission.submitted_at),
+            status=submission.status,
+            language_id=submission.language_id,
+            defaults={'count': 1}
+        )
+        if not created:
+            SubmissionRollup.objects.filter(pk=rollup.pk).update(count=F('count') + 1)
+
+
+def rebuild_rollups(contest):
+    """Recompute a contest's rollups from its submissions with one grouped query"""
+    counts = Submission.objects.filter(
+        problem__contest=contest
+    ).exclude(
+        status__in=PENDING_STATUSES
+    ).annotate(
+        bucket=TruncMinute('submitted_at', tzinfo=dt_timezone.utc)
+    ).values(
+        'problem_id', 'bucket', 'status', 'language_id'
+    ).annotate(count=Count('id')).order_by()
+
+    with transaction.atomic():
+        SubmissionRollup.objects.filter(contest=contest).delete()
+        SubmissionRollup.objects.bulk_create([
+            SubmissionRollup(contest=contest, **row)
+            for row in counts.iterator(chunk_size=5000)
+        ], batch_size=1000)
+
+
+def submission_timeline(rollups, interval):
+    """
+    Submissions per ``interval`` minutes as a list of
+    {'bucket', 'total', 'statuses': {status: count}}, oldest first.
+    """
+    rows = rollups.values('bucket', 'status').annotate(count=Sum('count')).order_by('bucket')
+    timeline = {}
+    for row in rows:
+        bucket = row['bucket']
+        if interval > 1:
+            minutes = int(bucket.timestamp() // 60)
+            bucket -= timedelta(minutes=minutes % interval)
+        point = timeline.setdefault(bucket, {'bucket': bucket, 'total': 0, 'statuses': {}})
+        point['total'] += row['count']
+        point['statuses'][row['status']] = point['statuses'].get(row['status'], 0) + row['count']
+    return list(timeline.values())
+
+
+def problem_acceptance(rollups):
+    """Submitted and accepted counts with the acceptance rate of every problem"""
+    rows = rollups.values('problem_id', 'problem__title').annotate(
+        total=Sum('count'),
+        accepted=Sum('count', filter=Q(status='Accepted'))
+    ).order_by('problem_id')
+    return [
+        {
+            'problem_id': row['problem_id'],
+            'problem_title': row['problem__title'],
+            'total_submissions': row['total'],
+            'accepted_submissions': row['accepted'] or 0,
+            'acceptance_rate': round((row['accepted'] or 0) * 100 / row['total'], 2) if row['total'] else 0,
+        }
+        for row in rows
+    ]
@@ -0,0 +1,139 @@
+"""
+Vectorized suspicious-activity scoring of coding sessions.
+
+All sessions of a contest are loaded into columnar NumPy arrays: one row per
+session for the ``UserActivity`` counters, one row per keystroke or
+copy-paste ``ActivityEvent``. Every feature is then computed for every
+session at once with ``np.diff``/``np.bincount``, with no per-session Python
+loop:
+
+- paste bursts: copy-pastes within ``PASTE_BURST_SECONDS`` of the previous one
+- focus-loss frequency: focus losses per active minute
+- idle ratio: idle time over total time
+- typing-speed anomalies: share of keystroke batches typed faster than
+  ``MAX_KEYS_PER_SECOND``
+
+Each feature is scaled to 0-1 against a saturation point and weighted into a
+0-100 score stored on the session. Compacted sessions keep the score they
+had when their raw events were deleted and are not rescored. NumPy is
+imported only when scoring runs.
+"""
+from django.conf import settings
+from django.utils import timezone
+
+from .models import ActivityEvent, UserActivity
+
+PASTE_BURST_SECONDS = getattr(settings, 'SCORING_PASTE_BURST_SECONDS', 10)
+MAX_KEYS_PER_SECOND = getattr(settings, 'SCORING_MAX_KEYS_PER_SECOND', 15)
+
+# Feature -> (value at which it saturates, weight). Weights sum to 1.
+FEATURE_WEIGHTS = {
+    'paste_bursts': (3, 0.30),
+    'focus_loss_per_minute': (1.0, 0.20),
+    'idle_ratio': (0.6, 0.15),
+    'typing_anomaly_ratio': (0.2, 0.35),
+}
+
+
+def numpy_available():
+    try:
+        import numpy  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _load_sessions(np, sessions):
+    rows = list(sessions.order_by('id').values_list(
+        'id', 'total_time_spent', 'idle_time', 'browser_focus_lost'
+    ))
+    columns = np.array(rows, dtype=np.float64).reshape(-1, 4)
+    return columns[:, 0].astype(np.int64), columns[:, 1], columns[:, 2], columns[:, 3]
+
+
+def _load_events(np, sessions):
+    """(session id, is paste, seconds, amount) columns, ordered by session then time"""
+    events = ActivityEvent.objects.filter(
+        activity__in=sessions,
+        event_type__in=['keystroke', 'copy_paste']
+    ).order_by('activity_id', 'occurred_at', 'id').values_list(
+        'activity_id', 'event_type', 'occurred_at', 'data__count'
+    )
+    activity_ids, is_paste, seconds, amounts = [], [], [], []
+    for activity_id, event_type, occurred_at, amount in events.iterator(chunk_size=10000):
+        activity_ids.append(activity_id)
+        is_paste.append(event_type == 'copy_paste')
+        seconds.append(occurred_at.timestamp())
+        amounts.append(amount if isinstance(amount, (int, float)) else 1)
+    return (
+        np.array(activity_ids, dtype=np.int64),
+        np.array(is_paste, dtype=bool),
+        np.array(seconds, dtype=np.float64),
+        np.array(amounts, dtype=np.float64),
+    )
+
+
+def compute_features(np, session_count, positions, is_paste, seconds, amounts,
+                     total_time, idle_time, focus_lost):
+    """Feature arrays (one value per session) from the columnar telemetry"""
+    # Paste bursts: consecutive pastes of one session close together in time
+    paste_positions = positions[is_paste]
+    paste_gaps = np.diff(seconds[is_paste])
+    in_burst = (paste_positions[1:] == paste_positions[:-1]) & (paste_gaps <= PASTE_BURST_SECONDS)
+    paste_bursts = np.bincount(paste_positions[1:][in_burst], minlength=session_count)
+
+    # Typing speed: keys in a batch over the time since the previous batch
+    typed = ~is_paste
+    key_positions = positions[typed]
+    same_session = key_positions[1:] == key_positions[:-1]
+    key_gaps = np.maximum(np.diff(seconds[typed]), 1e-3)
+    too_fast = same_session & (amounts[typed][1:] / key_gaps > MAX_KEYS_PER_SECOND)
+    intervals = np.bincount(key_positions[1:][same_session], minlength=session_count)
+    anomalies = np.bincount(key_positions[1:][too_fast], minlength=session_count)
+
+    active_minutes = np.maximum(total_time - idle_time, 60) / 60
+    return {
+        'paste_bursts': paste_bursts.astype(np.float64),
+        'focus_loss_per_minute': focus_lost / active_minutes,
+        'idle_ratio': np.clip(idle_time / np.maximum(total_time, 1), 0, 1),
+        'typing_anomaly_ratio': anomalies / np.maximum(intervals, 1),
+    }
+
+
+def combine(np, features):
+    """Weighted 0-100 score from the feature arrays"""
+    score = None
+    for name, (saturation, weight) in FEATURE_WEIGHTS.items():
+        part = weight * np.clip(features[name] / saturation, 0, 1)
+        score = part if score is None else score + part
+    return np.round(score * 100, 2)
+
+
+def score_contest_sessions(contest):
+    """Score every session of a contest not yet compacted and store the results. Returns the number scored."""
+    import numpy as np
+
+    sessions = UserActivity.objects.filter(problem__contest=contest, compacted_at__isnull=True)
+    session_ids, total_time, idle_time, focus_lost = _load_sessions(np, sessions)
+    if not len(session_ids):
+        return 0
+
+    activity_ids, is_paste, seconds, amounts = _load_events(np, sessions)
+    positions = np.searchsorted(session_ids, activity_ids)
+    features = compute_features(
+        np, len(session_ids), positions, is_paste, seconds, amounts,
+        total_time, idle_time, focus_lost
+    )
+    scores = combine(np, features)
+
+    scored_at = timezone.now()
+    UserActivity.objects.bulk_update([
+        UserActivity(
+            id=int(session_id),
+            suspicion_score=float(scores[index]),
+            suspicion_features={name: round(float(values[index]), 4) for name, values in features.items()},
+            scored_at=scored_at
+        )
+        for index, session_id in enumerate(session_ids)
+    ], ['suspicion_score', 'suspicion_features', 'scored_at'], batch_size=1000)
+    return len(session_ids)
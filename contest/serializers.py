@@ -1,5 +1,10 @@
 from rest_framework import serializers
-from .models import Contest, Problem, TestCase, Submission, UserActivity, PlagiarismCheck
+from .models import (
+    Contest, Problem, TestCase, Submission, UserActivity, PlagiarismCheck,
+    PlagiarismCluster, PlagiarismClusterMember, LeaderboardEntry, ActivityEvent,
+    CollusionGroup, CollusionGroupMember
+)
+from .telemetry import TELEMETRY_MAX_BATCH
 from users.models import User
 
 class TestCaseSerializer(serializers.ModelSerializer):
@@ -101,6 +106,17 @@ class ContestSerializer(serializers.ModelSerializer):
             representation['created_by'] = UserBasicSerializer(instance.created_by).data if instance.created_by else None
         return representation
 
+class ContestSummarySerializer(serializers.ModelSerializer):
+    """Contest row for listings: a problem count instead of nested problems"""
+    # Annotated by the listing queryset
+    problem_count = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = Contest
+        fields = ('id', 'title', 'description', 'start_time', 'end_time', 'created_by', 'problem_count',
+                 'departments', 'share_enabled', 'share_link', 'is_active')
+        read_only_fields = fields
+
 class SubmissionSerializer(serializers.ModelSerializer):
     ip_address = serializers.CharField(required=False, allow_blank=True, allow_null=True)
     
@@ -132,6 +148,24 @@ class Judge0SubmissionSerializer(serializers.Serializer):
     memory_limit = serializers.IntegerField(required=False)
     enable_network = serializers.BooleanField(required=False, default=False)
 
+class CollusionGroupMemberSerializer(serializers.ModelSerializer):
+    """Member user of a collusion group"""
+    username = serializers.CharField(source='user.username', read_only=True)
+
+    class Meta:
+        model = CollusionGroupMember
+        fields = ('user', 'username', 'strength', 'linked_users')
+
+
+class CollusionGroupSerializer(serializers.ModelSerializer):
+    """Collusion group with its members and the identifiers they share"""
+    members = CollusionGroupMemberSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = CollusionGroup
+        fields = ('id', 'contest', 'size', 'score', 'window_minutes', 'evidence', 'created_at', 'members')
+
+
 class SubmissionStatsSerializer(serializers.Serializer):
     total_submissions = serializers.IntegerField()
     accepted = serializers.IntegerField()
@@ -208,15 +242,85 @@ class UserActivitySerializer(serializers.ModelSerializer):
             'session_id', 'started_at', 'last_activity', 'total_time_spent',
             'code_changes', 'keystroke_patterns', 'mouse_movements', 'idle_time',
             'suspicious_activities', 'browser_focus_lost', 'copy_paste_attempts',
-            'external_resource_access'
+            'external_resource_access', 'event_count', 'keystroke_count',
+            'suspicion_score', 'suspicion_features', 'scored_at', 'telemetry_summary', 'compacted_at'
         )
 
 
+# JSON columns of a session that activity listings leave out (and defer)
+ACTIVITY_JSON_FIELDS = (
+    'code_changes', 'keystroke_patterns', 'suspicious_activities', 'external_resource_access',
+    'suspicion_features', 'telemetry_summary'
+)
+
+
+class UserActivityListSerializer(UserActivitySerializer):
+    """Session row for activity listings, without the JSON histories"""
+
+    class Meta(UserActivitySerializer.Meta):
+        fields = tuple(
+            field for field in UserActivitySerializer.Meta.fields if field not in ACTIVITY_JSON_FIELDS
+        )
+
+
+class TelemetryEventSerializer(serializers.Serializer):
+    """One client-side activity event"""
+    type = serializers.ChoiceField(choices=ActivityEvent.EVENT_TYPES, source='event_type')
+    timestamp = serializers.DateTimeField(source='occurred_at')
+    data = serializers.JSONField(required=False, default=dict)
+
+
+class TelemetryBatchSerializer(serializers.Serializer):
+    """A batch of activity events the client collected for one session"""
+    session_id = serializers.CharField(max_length=100)
+    time_spent = serializers.IntegerField(min_value=0, required=False, default=0, help_text="Seconds since the previous batch")
+    events = TelemetryEventSerializer(many=True, max_length=TELEMETRY_MAX_BATCH, allow_empty=True)
+
+
 from rest_framework import serializers
 from .models import Submission
 
-class SubmissionAnalyticsSerializer(serializers.ModelSerializer):
+class SparseFieldsetMixin:
+    """
+    Keep only the fields named in the request's ``fields`` query parameter
+    (comma-separated); unknown names are ignored, and if none of the names is
+    known every field is kept. ``model_columns`` maps the kept fields to the
+    columns the queryset has to load.
+    """
+    # Columns read by fields that have no model source (SerializerMethodField)
+    method_field_columns = {}
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        requested = self.requested_fields(self.context.get('request'))
+        if requested and requested & set(self.fields):
+            for name in set(self.fields) - requested:
+                self.fields.pop(name)
+
+    @staticmethod
+    def requested_fields(request):
+        if request is None:
+            return None
+        fields = request.query_params.get('fields')
+        if not fields:
+            return None
+        return {name.strip() for name in fields.split(',') if name.strip()}
+
+    def model_columns(self):
+        """Columns (``__`` paths for related fields) behind the kept fields"""
+        columns = {'pk'}
+        for name, field in self.fields.items():
+            if name in self.method_field_columns:
+                columns.update(self.method_field_columns[name])
+            elif field.source != '*':
+                columns.add(field.source.replace('.', '__'))
+        return columns
+
+
+class SubmissionAnalyticsSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """Enhanced submission serializer with analytics and security data"""
+    method_field_columns = {'language_name': ['language_id']}
+
     user_username = serializers.CharField(source='user.username', read_only=True)
     user_email = serializers.CharField(source='user.email', read_only=True)
     problem_title = serializers.CharField(source='problem.title', read_only=True)
@@ -249,6 +353,17 @@ class SubmissionAnalyticsSerializer(serializers.ModelSerializer):
         }
         return language_mapping.get(obj.language_id, f'Language ID {obj.language_id}')
 
+
+class SubmissionAnalyticsListSerializer(SubmissionAnalyticsSerializer):
+    """Compact analytics row for lists, without source code, program output or user agent"""
+    class Meta(SubmissionAnalyticsSerializer.Meta):
+        fields = (
+            'id', 'user', 'user_username', 'user_email', 'problem', 'problem_title',
+            'contest_title', 'language_id', 'language_name', 'status',
+            'time', 'memory', 'submitted_at', 'ip_address', 'session_id', 'time_spent_coding',
+            'keystrokes_count', 'copy_paste_events', 'tab_switches', 'code_similarity_score'
+        )
+
 class PlagiarismCheckSerializer(serializers.ModelSerializer):
     """Serializer for plagiarism detection results"""
     submission1_user = serializers.CharField(source='submission1.user.username', read_only=True)
@@ -266,6 +381,26 @@ class PlagiarismCheckSerializer(serializers.ModelSerializer):
         )
 
 
+class PlagiarismClusterMemberSerializer(serializers.ModelSerializer):
+    """Member submission of a plagiarism cluster"""
+    username = serializers.CharField(source='user.username', read_only=True)
+    problem_title = serializers.CharField(source='submission.problem.title', read_only=True)
+    submitted_at = serializers.DateTimeField(source='submission.submitted_at', read_only=True)
+
+    class Meta:
+        model = PlagiarismClusterMember
+        fields = ('submission', 'user', 'username', 'problem_title', 'submitted_at', 'max_similarity')
+
+
+class PlagiarismClusterSerializer(serializers.ModelSerializer):
+    """Plagiarism cluster with its members"""
+    members = PlagiarismClusterMemberSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = PlagiarismCluster
+        fields = ('id', 'contest', 'threshold', 'max_similarity', 'size', 'created_at', 'members')
+
+
 class SubmissionStatsSerializer(serializers.Serializer):
     """Serializer for submission statistics"""
     total_submissions = serializers.IntegerField()
@@ -294,5 +429,27 @@ class UserSubmissionSummarySerializer(serializers.Serializer):
     total_copy_paste_events = serializers.IntegerField()
     total_tab_switches = serializers.IntegerField()
     suspicious_activity_score = serializers.FloatField()
+    session_suspicion_score = serializers.FloatField(allow_null=True)
     last_submission_time = serializers.DateTimeField()
+    ip_addresses = serializers.ListField(child=serializers.CharField())
     flagged_for_plagiarism = serializers.BooleanField()
+
+
+class LeaderboardEntrySerializer(serializers.ModelSerializer):
+    """Leaderboard row with its rank"""
+    rank = serializers.IntegerField(read_only=True)
+    username = serializers.CharField(source='user.username', read_only=True)
+
+    class Meta:
+        model = LeaderboardEntry
+        fields = ('rank', 'user', 'username', 'solved_count', 'score', 'penalty', 'last_accepted_at')
+
+
+class StandingsRowSerializer(serializers.Serializer):
+    """Leaderboard row replayed from the verdict event log"""
+    rank = serializers.IntegerField()
+    user = serializers.IntegerField(source='user_id')
+    username = serializers.CharField()
+    solved_count = serializers.IntegerField()
+    score = serializers.IntegerField()
+    penalty = serializers.IntegerField()
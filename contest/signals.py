@@ -0,0 +1,44 @@
+"""
+Bump the content versions of contests and problems when they change.
+
+A contest's API representation nests its problems and their test cases, and a
+problem's nests its test cases, so a change to any of them bumps every
+version it shows up in.
+"""
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .caching import bump_content_version
+from .models import Contest, Problem, TestCase
+
+
+@receiver([post_save, post_delete], sender=Contest)
+def contest_changed(sender, instance, **kwargs):
+    bump_content_version('contest', instance.pk)
+
+
+@receiver(pre_save, sender=Problem)
+def problem_saving(sender, instance, **kwargs):
+    # A problem moved to another contest also leaves the one it was in
+    instance._previous_contest_id = None
+    if instance.pk is not None:
+        instance._previous_contest_id = Problem.objects.filter(
+            pk=instance.pk
+        ).values_list('contest_id', flat=True).first()
+
+
+@receiver([post_save, post_delete], sender=Problem)
+def problem_changed(sender, instance, **kwargs):
+    bump_content_version('problem', instance.pk)
+    bump_content_version('contest', instance.contest_id)
+    previous_contest_id = getattr(instance, '_previous_contest_id', None)
+    if previous_contest_id not in (None, instance.contest_id):
+        bump_content_version('contest', previous_contest_id)
+
+
+@receiver([post_save, post_delete], sender=TestCase)
+def test_case_changed(sender, instance, **kwargs):
+    contest_id = Problem.objects.filter(pk=instance.problem_id).values_list('contest_id', flat=True).first()
+    bump_content_version('problem', instance.problem_id)
+    if contest_id is not None:
+        bump_content_version('contest', contest_id)
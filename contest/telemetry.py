@@ -0,0 +1,98 @@
+"""
+Client telemetry ingestion.
+
+The editor batches activity events on the client and posts them together.
+Each batch is appended to ``ActivityEvent`` with chunked bulk inserts, and the
+session's counters on ``UserActivity`` are bumped with ``F()`` expressions in
+a single UPDATE, so recording events never rewrites the session row's JSON.
+Code carried by ``code_change`` events is moved into the session's
+delta-compressed code history (see ``code_history``), and flagged events are
+pushed to the contest's proctoring feed (see ``realtime``).
+"""
+from collections import Counter
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .code_history import record_code_changes
+from .models import ActivityEvent, UserActivity
+from .realtime import publish_flagged_events
+
+TELEMETRY_CHUNK_SIZE = getattr(settings, 'TELEMETRY_CHUNK_SIZE', 500)
+TELEMETRY_MAX_BATCH = getattr(settings, 'TELEMETRY_MAX_BATCH', 5000)
+
+# Event type -> (UserActivity counter, payload key holding the amount). Events
+# without an amount in their payload count as 1.
+COUNTERS = {
+    'keystroke': ('keystroke_count', 'count'),
+    'copy_paste': ('copy_paste_attempts', 'count'),
+    'focus_lost': ('browser_focus_lost', 'count'),
+    'mouse_move': ('mouse_movements', 'count'),
+    'idle': ('idle_time', 'seconds'),
+}
+
+# Event types proctors are alerted to, and that outlive telemetry compaction
+FLAGGED_EVENT_TYPES = ('copy_paste', 'external_resource', 'suspicious')
+
+
+def _amount(data, key):
+    try:
+        return max(int(data.get(key, 1)), 0)
+    except (TypeError, ValueError):
+        return 1
+
+
+def ingest_events(user, problem, session_id, events, time_spent=0):
+    """
+    Append a batch of validated events (dicts with event_type, occurred_at
+    and data) to the user's session and update its counters. Returns the
+    session's UserActivity.
+    """
+    # Code changes go to the delta-compressed code history; the event row
+    # keeps only the code's length
+    code_changes = []
+    for event in events:
+        data = event.get('data') or {}
+        if event['event_type'] == 'code_change' and isinstance(data.get('code'), str):
+            code = data.pop('code')
+            data['code_length'] = len(code)
+            event['data'] = data
+            code_changes.append((code, event['occurred_at']))
+
+    totals = Counter()
+    for event in events:
+        counter = COUNTERS.get(event['event_type'])
+        if counter:
+            field, key = counter
+            totals[field] += _amount(event.get('data') or {}, key)
+
+    with transaction.atomic():
+        activity, _ = UserActivity.objects.get_or_create(
+            user=user, problem=problem, session_id=session_id
+        )
+        ActivityEvent.objects.bulk_create([
+            ActivityEvent(
+                activity=activity,
+                event_type=event['event_type'],
+                occurred_at=event['occurred_at'],
+                data=event.get('data') or {}
+            )
+            for event in events
+        ], batch_size=TELEMETRY_CHUNK_SIZE)
+
+        changes = {field: F(field) + amount for field, amount in totals.items() if amount}
+        UserActivity.objects.filter(pk=activity.pk).update(
+            event_count=F('event_count') + len(events),
+            total_time_spent=F('total_time_spent') + time_spent,
+            last_activity=timezone.now(),
+            **changes
+        )
+        if code_changes:
+            code_changes.sort(key=lambda change: change[1])
+            record_code_changes(activity, code_changes)
+        publish_flagged_events(
+            activity, problem, [event for event in events if event['event_type'] in FLAGGED_EVENT_TYPES]
+        )
+    return activity
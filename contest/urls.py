@@ -4,7 +4,8 @@ from .views import (
     ContestViewSet, ProblemViewSet, ContestDetailView, ContestProblemView,
     ProblemDetailView, ProblemSubmissionView, SubmissionStatusView, 
     TestCaseViewSet, ViewProblemDetailView, SubmissionAnalyticsViewSet,
-    UserActivityViewSet, PlagiarismCheckViewSet
+    UserActivityViewSet, PlagiarismCheckViewSet, PlagiarismClusterViewSet, TelemetryIngestView,
+    CodeHistoryView, CollusionGroupViewSet
 )
 
 router = DefaultRouter()
@@ -12,6 +13,10 @@ router.register(r'contests', ContestViewSet, basename='contest')
 router.register(r'problems', ProblemViewSet, basename='problem')
 router.register(r'testcases', TestCaseViewSet, basename='testcase')
 router.register(r'analytics/submissions', SubmissionAnalyticsViewSet, basename='submission-analytics')
+router.register(r'analytics/activities', UserActivityViewSet, basename='user-activity')
+router.register(r'analytics/plagiarism/checks', PlagiarismCheckViewSet, basename='plagiarism-check')
+router.register(r'analytics/plagiarism/clusters', PlagiarismClusterViewSet, basename='plagiarism-cluster')
+router.register(r'analytics/collusion/groups', CollusionGroupViewSet, basename='collusion-group')
 
 urlpatterns = [
     path('', include(router.urls)),
@@ -19,6 +24,8 @@ urlpatterns = [
     path('contests/<int:contest_id>/problems/', ContestProblemView.as_view(), name='contest-problems'),
     path('problems/<int:id>/detail/', ProblemDetailView.as_view(), name='problem-detail'),
     path('problems/<int:problem_id>/submit/', ProblemSubmissionView.as_view(), name='problem-submit'),
+    path('problems/<int:problem_id>/telemetry/', TelemetryIngestView.as_view(), name='problem-telemetry'),
     path('submissions/<int:id>/status/', SubmissionStatusView.as_view(), name='submission-status'),
+    path('analytics/activities/<int:activity_id>/code/', CodeHistoryView.as_view(), name='activity-code-history'),
     path('problems/<int:id>/view/', ViewProblemDetailView.as_view(), name='view-problem-detail'),
 ]
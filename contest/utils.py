@@ -37,3 +37,39 @@ class IsContestCreator(permissions.BasePermission):
         if hasattr(obj, 'created_by'):
             return obj.created_by == request.user
         return False
+
+
+class UnionFind:
+    """
+    Disjoint-set forest with path compression and union by size.
+    Elements are added lazily the first time they are seen.
+    """
+    def __init__(self):
+        self.parent = {}
+        self.size = {}
+
+    def find(self, item):
+        parent = self.parent.setdefault(item, item)
+        if parent == item:
+            self.size.setdefault(item, 1)
+            return item
+        root = self.find(parent)
+        self.parent[item] = root
+        return root
+
+    def union(self, item1, item2):
+        root1, root2 = self.find(item1), self.find(item2)
+        if root1 == root2:
+            return root1
+        if self.size[root1] < self.size[root2]:
+            root1, root2 = root2, root1
+        self.parent[root2] = root1
+        self.size[root1] += self.size[root2]
+        return root1
+
+    def groups(self):
+        """Map each root to the list of elements in its set"""
+        groups = {}
+        for item in self.parent:
+            groups.setdefault(self.find(item), []).append(item)
+        return groups
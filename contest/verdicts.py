@@ -0,0 +1,56 @@
+"""
+Hooks that run whenever a submission verdict is written.
+
+Views that finalize a submission's status write it with ``write_verdict``,
+which moves the submission out of its pending status with a conditional
+update and calls ``record_verdict`` only when that update took effect. Every
+table derived from verdicts is kept up to date in one place, and a verdict
+written twice (concurrent status polls, a retried request) is recorded once.
+"""
+from django.utils import timezone
+
+from .attempts import update_attempt_state
+from .caching import invalidate_contest_statistics
+from .leaderboard import append_verdict_event, update_leaderboard
+from .models import Submission
+from .performance import record_performance
+from .plagiarism import index_submission, update_similarity_score
+from .realtime import publish_verdict
+from .rollups import PENDING_STATUSES, update_rollup
+
+
+def write_verdict(submission, fields):
+    """
+    Save the submission's status and ``fields`` while it is still pending.
+    Returns True when this call moved it to a final status and recorded the
+    verdict, False when it is still pending or another request already
+    finalized it.
+    """
+    # A queryset update skips auto_now, so updated_at is set here
+    submission.updated_at = timezone.now()
+    values = {field: getattr(submission, field) for field in ['status', 'updated_at', *fields]}
+    updated = Submission.objects.filter(
+        pk=submission.pk,
+        status__in=PENDING_STATUSES
+    ).update(**values)
+    if not updated or submission.status in PENDING_STATUSES:
+        return False
+    record_verdict(submission)
+    return True
+
+
+def record_verdict(submission):
+    """Propagate a freshly written verdict to the derived tables"""
+    update_attempt_state(submission)
+    update_leaderboard(submission)
+    append_verdict_event(submission)
+    update_rollup(submission)
+    publish_verdict(submission)
+
+    if submission.status == 'Accepted':
+        fingerprint = index_submission(submission)
+        update_similarity_score(submission, fingerprint)
+        record_performance(submission)
+
+    # Last, so statistics cached meanwhile cannot miss the similarity score
+    invalidate_contest_statistics(submission.problem.contest_id)
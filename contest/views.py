@@ -2,24 +2,51 @@ import uuid
 from rest_framework import status, generics, viewsets, filters, permissions
 from rest_framework.response import Response
 from rest_framework.decorators import action, api_view
+from rest_framework.pagination import CursorPagination
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.permissions import IsAuthenticated
 from django.shortcuts import get_object_or_404
-from django.db.models import Count, Q, F, Case, When, IntegerField, Value, Sum, Avg
+from django.http import StreamingHttpResponse
+from django.db.models import (
+    Count, Q, F, Case, When, IntegerField, FloatField, Value, Sum, Avg, Max, Prefetch, OuterRef, Subquery
+)
+from django.db.models.functions import Coalesce, Greatest
+from django.core.cache import cache
 from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.utils.http import parse_etags
 from django.contrib.auth import get_user_model
 from django.conf import settings
 from datetime import timedelta
 import difflib
 import requests
 from .permissions import get_client_ip, IsAdminUser, IsContestCreator
-from .models import Contest, Problem, TestCase, Submission, UserActivity, PlagiarismCheck
+from .models import (
+    Contest, Problem, TestCase, Submission, UserActivity, PlagiarismCheck,
+    PlagiarismCluster, PlagiarismClusterMember, SubmissionRollup, CollusionGroup, CollusionGroupMember
+)
+from .attempts import get_attempt_state, record_attempt
+from .caching import content_body_cache_key, content_version, statistics_cache_key
+from .code_history import code_at
+from .collusion import MAX_USERS_PER_IDENTIFIER, WINDOW_MINUTES, build_collusion_groups
+from .exports import parquet_available, stream_csv, stream_parquet
+from .leaderboard import frozen_standings, freeze_time, is_frozen, leaderboard_page, standings_at
+from .performance import METRICS as PERFORMANCE_METRICS, histogram, metric_value, percentile_rank
+from .plagiarism import (
+    HIGH_SIMILARITY_THRESHOLD, build_clusters, compare_submissions, find_near_duplicates,
+    index_submission, minhash_signature, submission_signature
+)
+from .rollups import problem_acceptance, submission_timeline
+from .telemetry import ingest_events
+from .verdicts import write_verdict
 from .serializers import (
-    ContestSerializer, ProblemSerializer, ProblemDetailSerializer, 
+    ContestSerializer, ContestSummarySerializer, ProblemSerializer, ProblemDetailSerializer, 
     TestCaseSerializer, TestCaseAdminSerializer, SubmissionSerializer, 
     SubmissionDetailSerializer, BulkProblemSerializer, ProblemAdminSerializer,
     SubmissionAnalyticsSerializer, UserActivitySerializer, PlagiarismCheckSerializer,
-    SubmissionStatsSerializer, UserSubmissionSummarySerializer
+    SubmissionStatsSerializer, UserSubmissionSummarySerializer, PlagiarismClusterSerializer,
+    LeaderboardEntrySerializer, StandingsRowSerializer, SubmissionAnalyticsListSerializer,
+    TelemetryBatchSerializer, CollusionGroupSerializer, UserActivityListSerializer, ACTIVITY_JSON_FIELDS
 )
 from django.core.exceptions import PermissionDenied
 
@@ -43,9 +70,61 @@ JUDGE0_API_URL = getattr(settings, 'JUDGE0_API_URL', 'http://localhost:2358')
 import logging
 logger = logging.getLogger('contest.views')
 
-class ContestViewSet(viewsets.ModelViewSet):
+# Default and maximum number of ranks returned by one leaderboard request
+LEADERBOARD_PAGE_SIZE = 50
+LEADERBOARD_MAX_PAGE_SIZE = 500
+
+# Seconds a serialized contest or problem body stays cached for its version
+CONTENT_CACHE_TTL = getattr(settings, 'CONTENT_CACHE_TTL', 300)
+
+
+class VersionedRetrieveMixin:
+    """
+    Retrieve with a version-based ETag. The version of the object (see
+    ``caching.content_version``) changes whenever it or anything nested in its
+    representation changes, so a matching ``If-None-Match`` gets a 304 after a
+    single cache lookup, and other reads are served from the cached body of
+    the current version.
+    """
+    version_kind = None
+
+    def retrieve(self, request, *args, **kwargs):
+        pk = self.kwargs[self.lookup_url_kwarg or self.lookup_field]
+        version = content_version(self.version_kind, pk)
+        # Views with different serializers share versions but not ETags
+        scope = f'{self.version_kind}:{self.__class__.__name__}'
+        etag = f'"{scope}:{pk}:{version}"'
+
+        headers = {'ETag': etag, 'Cache-Control': 'private, no-cache'}
+        if etag in parse_etags(request.headers.get('If-None-Match', '')):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+        cache_key = content_body_cache_key(scope, pk, version)
+        data = cache.get(cache_key)
+        if data is None:
+            data = super().retrieve(request, *args, **kwargs).data
+            cache.set(cache_key, data, CONTENT_CACHE_TTL)
+        return Response(data, headers=headers)
+
+
+def with_problems(contests):
+    """Contests with their problems and test cases loaded in two more queries"""
+    return contests.prefetch_related(
+        Prefetch('problems', queryset=Problem.objects.order_by('id')),
+        Prefetch('problems__test_cases', queryset=TestCase.objects.order_by('order', 'id'))
+    )
+
+
+class ContestViewSet(VersionedRetrieveMixin, viewsets.ModelViewSet):
     serializer_class = ContestSerializer
     permission_classes = [permissions.IsAuthenticated]
+    version_kind = 'contest'
+
+    def get_serializer_class(self):
+        # Listings only show a problem count
+        if self.action == 'list':
+            return ContestSummarySerializer
+        return ContestSerializer
 
     @action(detail=True, methods=['get'])
     def check_eligibility(self, request, pk=None):
@@ -200,6 +279,11 @@ class ContestViewSet(viewsets.ModelViewSet):
             return Contest.objects.filter(created_by=user)
             
         logger.info("Returning all contests for read operation")
+        if self.action == 'list':
+            # One query: problems are only counted
+            return Contest.objects.annotate(problem_count=Count('problems'))
+        if self.action == 'retrieve':
+            return with_problems(Contest.objects.all())
         return Contest.objects.all()
 
     def check_eligibility(self,request,pk=None):
@@ -228,6 +312,65 @@ class ContestViewSet(viewsets.ModelViewSet):
         logger.info(f"Requested contest ID: {kwargs.get('pk')}")
         return super().retrieve(request, *args, **kwargs)
 
+    @action(detail=True, methods=['get'])
+    def leaderboard(self, request, pk=None):
+        """
+        Get the contest standings between two ranks (start and end, inclusive).
+        Admins may pass ``at`` (ISO datetime) to see the standings at that
+        moment; everyone else sees the frozen standings once the freeze starts.
+        """
+        contest = self.get_object()
+        try:
+            start = max(int(request.query_params.get('start', 1)), 1)
+            end = int(request.query_params.get('end', start + LEADERBOARD_PAGE_SIZE - 1))
+        except ValueError:
+            return Response(
+                {'error': 'start and end must be integers'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        end = min(max(end, start), start + LEADERBOARD_MAX_PAGE_SIZE - 1)
+
+        user = request.user
+        is_admin = user.is_staff or getattr(user, 'role', None) == 'ADMIN'
+
+        at = request.query_params.get('at')
+        frozen = False
+        if at and is_admin:
+            as_of = parse_datetime(at)
+            if as_of is None:
+                return Response(
+                    {'error': 'at must be an ISO 8601 datetime'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            if timezone.is_naive(as_of):
+                as_of = timezone.make_aware(as_of)
+            rows = standings_at(contest, as_of)
+        elif not is_admin and is_frozen(contest):
+            frozen = True
+            as_of = freeze_time(contest)
+            rows = frozen_standings(contest)
+        else:
+            entries = leaderboard_page(contest, start, end)
+            return Response({
+                'contest_id': contest.id,
+                'start': start,
+                'end': end,
+                'total': contest.leaderboard.count(),
+                'frozen': False,
+                'as_of': timezone.now(),
+                'results': LeaderboardEntrySerializer(entries, many=True).data
+            })
+
+        return Response({
+            'contest_id': contest.id,
+            'start': start,
+            'end': end,
+            'total': len(rows),
+            'frozen': frozen,
+            'as_of': as_of,
+            'results': StandingsRowSerializer(rows[start - 1:end], many=True).data
+        })
+
     @action(detail=True, methods=['post'])
     def enable_sharing(self, request, pk=None):
         """Enable sharing for a contest and generate share link"""
@@ -357,23 +500,25 @@ class ContestProblemView(generics.GenericAPIView):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
-class ContestDetailView(generics.RetrieveUpdateDestroyAPIView):
+class ContestDetailView(VersionedRetrieveMixin, generics.RetrieveUpdateDestroyAPIView):
     queryset = Contest.objects.all()
     serializer_class = ContestSerializer
     permission_classes = [permissions.IsAuthenticated, IsContestCreator]
     lookup_field = 'id'
+    version_kind = 'contest'
     
     def get_queryset(self):
         if self.request.method == 'GET':
-            return Contest.objects.all()
+            return with_problems(Contest.objects.all())
         return Contest.objects.filter(created_by=self.request.user)
 
-class ProblemDetailView(generics.RetrieveAPIView):
+class ProblemDetailView(VersionedRetrieveMixin, generics.RetrieveAPIView):
     """View for users to get problem details with test cases"""
-    queryset = Problem.objects.all()
+    queryset = Problem.objects.prefetch_related('test_cases')
     serializer_class = ProblemDetailSerializer
     permission_classes = []  # Remove authentication requirement for testing
     lookup_field = 'id'
+    version_kind = 'problem'
 
     def get_object(self):
         problem = super().get_object()
@@ -394,14 +539,9 @@ class ProblemSubmissionView(generics.CreateAPIView):
             # Get or create default user for testing
             default_user = get_user_model().objects.get(username='anonymous_user')
             
-            # Get submission statistics
-            submissions = Submission.objects.filter(
-                problem=problem,
-                user=default_user
-            ).order_by('-submitted_at')
-            
-            submission_count = submissions.count()
-            last_submission = submissions.first()
+            # Get submission statistics from the user's attempt state
+            state = get_attempt_state(default_user, problem)
+            submission_count = state.attempts if state else 0
             
             return Response({
                 "problem_id": problem_id,
@@ -409,10 +549,10 @@ class ProblemSubmissionView(generics.CreateAPIView):
                 "submissions_remaining": max(0, problem.max_submissions - submission_count),
                 "max_submissions": problem.max_submissions,
                 "last_submission": {
-                    "time": last_submission.submitted_at if last_submission else None,
-                    "status": last_submission.status if last_submission else None,
-                    "id": last_submission.id if last_submission else None
-                } if last_submission else None
+                    "time": state.last_submitted_at,
+                    "status": state.last_status,
+                    "id": state.last_submission_id
+                } if state and state.last_submission_id else None
             })
             
         except Problem.DoesNotExist:
@@ -447,33 +587,24 @@ class ProblemSubmissionView(generics.CreateAPIView):
             }
         )
 
-        # Check submission limit (using default user for testing)
-        user_submissions = Submission.objects.filter(
-            problem=problem, 
-            user=default_user
-        )
-        
-        # Get the last submission and its status
-        last_submission = user_submissions.order_by('-submitted_at').first()
-        
-        # Count only completed submissions (not in queue/processing/error)
-        completed_submissions = user_submissions.exclude(
-            status__in=['In Queue', 'Processing', 'Internal Error']
-        ).count()
+        # Check submission limit (using default user for testing) against the
+        # user's attempt state; only completed submissions count
+        state = get_attempt_state(default_user, problem)
+        completed_submissions = state.completed_attempts if state else 0
         
         # Allow new submission if under limit or if last submission is still processing
         if completed_submissions < problem.max_submissions:
             pass  # Continue with submission
-        elif last_submission and last_submission.status in ['In Queue', 'Processing']:
+        elif state and state.last_status in ['In Queue', 'Processing']:
             # Last submission is still processing, return status
             return Response({
                 "detail": "Previous submission is still being processed",
                 "submissions_made": completed_submissions,
                 "max_submissions": problem.max_submissions,
                 "last_submission": {
-                    'id': last_submission.id,
-                    'time': last_submission.submitted_at,
-                    'status': last_submission.status
+                    'id': state.last_submission_id,
+                    'time': state.last_submitted_at,
+                    'status': state.last_status
                 },
                 "message": "Please wait for your previous submission to complete"
             }, status=status.HTTP_400_BAD_REQUEST)
@@ -484,9 +615,9 @@ class ProblemSubmissionView(generics.CreateAPIView):
                 "submissions_made": completed_submissions,
                 "max_submissions": problem.max_submissions,
                 "last_submission": {
-                    'id': last_submission.id if last_submission else None,
-                    'time': last_submission.submitted_at if last_submission else None,
-                    'status': last_submission.status if last_submission else None
+                    'id': state.last_submission_id if state else None,
+                    'time': state.last_submitted_at if state else None,
+                    'status': (state.last_status or None) if state else None
                 },
                 "message": "Only completed submissions count towards the limit"
             }, status=status.HTTP_400_BAD_REQUEST)
@@ -507,6 +638,7 @@ class ProblemSubmissionView(generics.CreateAPIView):
         serializer = self.get_serializer(data=submission_data)
         serializer.is_valid(raise_exception=True)
         submission = serializer.save()
+        record_attempt(submission)
 
         # Automatic test case judging: run against all test cases
         import base64
@@ -581,9 +713,13 @@ class ProblemSubmissionView(generics.CreateAPIView):
             if not passed:
                 all_passed = False
         
-        # Update submission status
+        # Update submission status; runtime and memory are the worst over the test cases
         submission.status = 'Accepted' if all_passed else 'Wrong Answer'
-        submission.save()
+        times = [float(result['time']) for result in results if result['time'] is not None]
+        memories = [result['memory'] for result in results if result['memory'] is not None]
+        submission.time = max(times) if times else None
+        submission.memory = max(memories) if memories else None
+        write_verdict(submission, ['time', 'memory'])
         
         return Response({
             "all_passed": all_passed,
@@ -824,7 +960,11 @@ class SubmissionStatusView(generics.RetrieveAPIView):
                 self.update_submission_status(submission, judge0_status)
             except Exception as e:
                 submission.status = 'Internal Error'
-                submission.save()
+            # Written outside the try so a failing verdict hook cannot turn
+            # the verdict into an Internal Error; only the poll that finalizes
+            # the submission records it
+            if not write_verdict(submission, self.result_fields):
+                submission.refresh_from_db()
         
         serializer = self.get_serializer(submission)
         return Response(serializer.data)
@@ -844,8 +984,11 @@ class SubmissionStatusView(generics.RetrieveAPIView):
         else:
             raise Exception(f"Judge0 API error: {response.status_code}")
 
+    # Submission fields set from the Judge0 response besides the status
+    result_fields = ['stdout', 'stderr', 'compile_output', 'time', 'memory']
+
     def update_submission_status(self, submission, judge0_data):
-        """Update submission with Judge0 response data"""
+        """Update submission with Judge0 response data; the caller saves it"""
         import base64
 
         def decode_base64(s):
@@ -890,8 +1033,6 @@ class SubmissionStatusView(generics.RetrieveAPIView):
                 # Robust comparison: strip trailing whitespace from both
                 if user_output.rstrip() == expected_output.rstrip():
                     submission.status = 'Accepted'
-        
-        submission.save()
 
 class TestCaseViewSet(viewsets.ModelViewSet):
     """ViewSet for managing test cases (admin only)"""
@@ -1081,13 +1222,43 @@ class SubmissionAnalyticsViewSet(viewsets.ModelViewSet):
 
 
 # Analytics and Monitoring Views
+
+# Copy-paste events and tab switches above which behaviour counts as suspicious
+SUSPICIOUS_COPY_PASTE_EVENTS = 10
+SUSPICIOUS_TAB_SWITCHES = 20
+
+# Seconds contest-wide submission statistics stay cached
+STATISTICS_CACHE_TTL = getattr(settings, 'ANALYTICS_STATISTICS_CACHE_TTL', 30)
+
+class UserSummaryPagination(CursorPagination):
+    """Keyset pagination over per-user summaries, most suspicious first"""
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+    ordering = ('-suspicious_activity_score', 'user_id')
+
+
 class SubmissionAnalyticsViewSet(viewsets.ReadOnlyModelViewSet):
     """Comprehensive submission analytics for admin monitoring"""
     serializer_class = SubmissionAnalyticsSerializer
     permission_classes = [IsAdminUser]
-    
+
+    def get_serializer_class(self):
+        # Source code and program output only load on detail
+        if self.action == 'list':
+            return SubmissionAnalyticsListSerializer
+        return SubmissionAnalyticsSerializer
+
     def get_queryset(self):
-        queryset = Submission.objects.select_related('user', 'problem', 'problem__contest').all()
+        if self.action in ('list', 'retrieve'):
+            # Load only the columns the (possibly sparse) serializer reads
+            columns = self.get_serializer().model_columns()
+            relations = {column.rsplit('__', 1)[0] for column in columns if '__' in column}
+            queryset = Submission.objects.only(*columns)
+            if relations:
+                queryset = queryset.select_related(*relations)
+        else:
+            queryset = Submission.objects.select_related('user', 'problem', 'problem__contest').all()
         
         # Filter by contest if specified
         contest_id = self.request.query_params.get('contest_id')
@@ -1116,44 +1287,50 @@ class SubmissionAnalyticsViewSet(viewsets.ReadOnlyModelViewSet):
             queryset = queryset.filter(submitted_at__gte=start_date)
         if end_date:
             queryset = queryset.filter(submitted_at__lte=end_date)
+
+        # Filter by code similarity (0-1) to earlier submissions
+        min_similarity = self.request.query_params.get('min_similarity')
+        if min_similarity:
+            queryset = queryset.filter(code_similarity_score__gte=min_similarity)
             
         return queryset.order_by('-submitted_at')
     
     @action(detail=False, methods=['get'])
     def statistics(self, request):
         """Get overall submission statistics"""
-        queryset = self.get_queryset()
-        
-        total_submissions = queryset.count()
-        if total_submissions == 0:
-            return Response({
-                'total_submissions': 0,
-                'accepted_submissions': 0,
-                'wrong_answer_submissions': 0,
-                'compilation_error_submissions': 0,
-                'runtime_error_submissions': 0,
-                'time_limit_exceeded_submissions': 0,
-                'memory_limit_exceeded_submissions': 0,
-                'acceptance_rate': 0,
-                'average_time_spent': 0,
-                'suspicious_activity_count': 0,
-                'high_similarity_count': 0
-            })
+        # Contest-wide statistics are cached briefly; the cache entry is
+        # dropped whenever a verdict is written for the contest
+        contest_id = request.query_params.get('contest_id')
+        cache_key = None
+        if contest_id and set(request.query_params) == {'contest_id'}:
+            cache_key = statistics_cache_key(contest_id)
+            cached = cache.get(cache_key)
+            if cached is not None:
+                return Response(cached)
+
+        # Every figure comes from a single conditional aggregate over the table
+        stats = self.get_queryset().order_by().aggregate(
+            total=Count('id'),
+            accepted=Count('id', filter=Q(status='Accepted')),
+            wrong_answer=Count('id', filter=Q(status='Wrong Answer')),
+            compilation_error=Count('id', filter=Q(status='Compilation Error')),
+            runtime_error=Count('id', filter=Q(status='Runtime Error')),
+            time_limit_exceeded=Count('id', filter=Q(status='Time Limit Exceeded')),
+            memory_limit_exceeded=Count('id', filter=Q(status='Memory Limit Exceeded')),
+            average_time_spent=Avg('time_spent_coding'),
+            suspicious=Count('id', filter=(
+                Q(copy_paste_events__gt=SUSPICIOUS_COPY_PASTE_EVENTS) |
+                Q(tab_switches__gt=SUSPICIOUS_TAB_SWITCHES)
+            )),
+            high_similarity=Count('id', filter=Q(code_similarity_score__gte=HIGH_SIMILARITY_THRESHOLD))
+        )
         
-        # Calculate basic submission statistics
-        stats = {
-            'accepted': queryset.filter(status='Accepted').count(),
-            'wrong_answer': queryset.filter(status='Wrong Answer').count(),
-            'compilation_error': queryset.filter(status='Compilation Error').count(),
-            'runtime_error': queryset.filter(status='Runtime Error').count(),
-            'time_limit_exceeded': queryset.filter(status='Time Limit Exceeded').count(),
-            'memory_limit_exceeded': queryset.filter(status='Memory Limit Exceeded').count(),
-        }
+        total_submissions = stats['total']
         
         # Calculate acceptance rate
         acceptance_rate = (stats['accepted'] / total_submissions) * 100 if total_submissions > 0 else 0
         
-        return Response({
+        data = {
             'total_submissions': total_submissions,
             'accepted_submissions': stats['accepted'],
             'wrong_answer_submissions': stats['wrong_answer'],
@@ -1162,83 +1339,278 @@ class SubmissionAnalyticsViewSet(viewsets.ReadOnlyModelViewSet):
             'time_limit_exceeded_submissions': stats['time_limit_exceeded'],
             'memory_limit_exceeded_submissions': stats['memory_limit_exceeded'],
             'acceptance_rate': round(acceptance_rate, 2),
-            'average_time_spent': 0,  # Not currently tracked in the model
-            'suspicious_activity_count': 0,  # Not currently tracked in the model
-            'high_similarity_count': 0  # Not currently tracked in the model
-        })
+            'average_time_spent': round(stats['average_time_spent'] or 0, 2),
+            'suspicious_activity_count': stats['suspicious'],
+            'high_similarity_count': stats['high_similarity']
+        }
+
+        if cache_key:
+            cache.set(cache_key, data, STATISTICS_CACHE_TTL)
+        return Response(data)
     
     @action(detail=False, methods=['get'])
     def user_summary(self, request):
         """Get summary of all users' submission activities"""
-        users_data = []
-        users = get_user_model().objects.filter(submissions__isnull=False).distinct()
-        
-        for user in users:
-            user_submissions = Submission.objects.filter(user=user)
-            
-            if user_submissions.exists():
-                stats = user_submissions.aggregate(
-                    total=Count('id'),
-                    accepted=Count('id', filter=Q(status='Accepted')),
-                    wrong_answer=Count('id', filter=Q(status='Wrong Answer')),
-                    compilation_error=Count('id', filter=Q(status='Compilation Error')),
-                    avg_time_spent=Avg('time_spent_coding'),
-                    total_copy_paste=Count('copy_paste_events'),
-                    total_tab_switches=Count('tab_switches')
-                )
-                
-                # Calculate suspicious activity score
-                suspicious_score = 0
-                if stats['total_copy_paste'] > 10:
-                    suspicious_score += 30
-                if stats['total_tab_switches'] > 20:
-                    suspicious_score += 20
-                
-                # Get unique IP addresses
-                ip_addresses = list(user_submissions.exclude(ip_address__isnull=True).values_list('ip_address', flat=True).distinct())
-                
-                users_data.append({
-                    'user_id': user.id,
-                    'username': user.username,
-                    'email': user.email,
-                    'total_submissions': stats['total'],
-                    'accepted_count': stats['accepted'],
-                    'wrong_answer_count': stats['wrong_answer'],
-                    'compilation_error_count': stats['compilation_error'],
-                    'average_time_spent': round(stats['avg_time_spent'] or 0, 2),
-                    'total_copy_paste_events': stats['total_copy_paste'],
-                    'total_tab_switches': stats['total_tab_switches'],
-                    'suspicious_activity_score': suspicious_score,
-                    'last_submission_time': user_submissions.first().submitted_at,
-                    'ip_addresses': ip_addresses,
-                    'flagged_for_plagiarism': False
-                })
-        
-        # Sort by suspicious activity score (highest first)
-        users_data.sort(key=lambda x: x['suspicious_activity_score'], reverse=True)
-        
-        return Response(users_data)
+        if not request.query_params.get('contest_id'):
+            return Response({'error': 'contest_id is required'}, status=400)
+
+        submissions = self.get_queryset().order_by()
+
+        # Highest suspicion score of the user's scored coding sessions in the contest
+        session_scores = UserActivity.objects.filter(
+            user_id=OuterRef('user_id'),
+            problem__contest_id=request.query_params['contest_id'],
+            suspicion_score__isnull=False
+        ).order_by().values('user_id').annotate(top=Max('suspicion_score')).values('top')
+
+        # One grouped query for every per-user figure
+        users = submissions.values('user_id').annotate(
+            username=F('user__username'),
+            email=F('user__email'),
+            total_submissions=Count('id'),
+            accepted_count=Count('id', filter=Q(status='Accepted')),
+            wrong_answer_count=Count('id', filter=Q(status='Wrong Answer')),
+            compilation_error_count=Count('id', filter=Q(status='Compilation Error')),
+            average_time_spent=Avg('time_spent_coding'),
+            total_copy_paste_events=Coalesce(Sum('copy_paste_events'), 0),
+            total_tab_switches=Coalesce(Sum('tab_switches'), 0),
+            last_submission_time=Max('submitted_at'),
+            high_similarity_count=Count('id', filter=Q(code_similarity_score__gte=HIGH_SIMILARITY_THRESHOLD)),
+            session_suspicion_score=Subquery(session_scores, output_field=FloatField())
+        ).annotate(
+            # Calculate suspicious activity score: the submission-counter rules,
+            # raised to the session score once sessions have been scored
+            suspicious_activity_score=Greatest(
+                Case(When(total_copy_paste_events__gt=SUSPICIOUS_COPY_PASTE_EVENTS, then=Value(30)), default=Value(0)) +
+                Case(When(total_tab_switches__gt=SUSPICIOUS_TAB_SWITCHES, then=Value(20)), default=Value(0)),
+                Coalesce(F('session_suspicion_score'), Value(0.0)),
+                output_field=FloatField()
+            )
+        )
+
+        paginator = UserSummaryPagination()
+        page = paginator.paginate_queryset(users, request, view=self)
+
+        # Unique IP addresses of the users on this page only
+        ip_addresses = {}
+        for user_id, ip_address in submissions.filter(
+            user_id__in=[row['user_id'] for row in page],
+            ip_address__isnull=False
+        ).values_list('user_id', 'ip_address').distinct():
+            ip_addresses.setdefault(user_id, []).append(ip_address)
+
+        for row in page:
+            row['average_time_spent'] = round(row['average_time_spent'] or 0, 2)
+            row['ip_addresses'] = ip_addresses.get(row['user_id'], [])
+            row['flagged_for_plagiarism'] = row['high_similarity_count'] > 0
+
+        serializer = UserSubmissionSummarySerializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
+
+    def _rollups(self, request):
+        """Rollup rows of the requested contest, narrowed by the chart filters"""
+        rollups = SubmissionRollup.objects.filter(contest_id=request.query_params['contest_id'])
+        problem_id = request.query_params.get('problem_id')
+        if problem_id:
+            rollups = rollups.filter(problem_id=problem_id)
+        language_id = request.query_params.get('language_id')
+        if language_id:
+            rollups = rollups.filter(language_id=language_id)
+        start_date = request.query_params.get('start_date')
+        end_date = request.query_params.get('end_date')
+        if start_date:
+            rollups = rollups.filter(bucket__gte=start_date)
+        if end_date:
+            rollups = rollups.filter(bucket__lte=end_date)
+        return rollups
+
+    @action(detail=False, methods=['get'])
+    def timeline(self, request):
+        """Submissions per time bucket and status, read from the rollup table"""
+        if not request.query_params.get('contest_id'):
+            return Response({'error': 'contest_id is required'}, status=400)
+        try:
+            interval = int(request.query_params.get('interval', 1))
+        except ValueError:
+            return Response({'error': 'interval must be an integer'}, status=400)
+        if not 1 <= interval <= 1440:
+            return Response({'error': 'interval must be between 1 and 1440 minutes'}, status=400)
+
+        return Response({
+            'interval': interval,
+            'results': submission_timeline(self._rollups(request), interval)
+        })
+
+    @action(detail=False, methods=['get'])
+    def acceptance_by_problem(self, request):
+        """Submission and acceptance counts per problem, read from the rollup table"""
+        if not request.query_params.get('contest_id'):
+            return Response({'error': 'contest_id is required'}, status=400)
+        return Response(problem_acceptance(self._rollups(request)))
+
+    @action(detail=False, methods=['get'])
+    def performance_histogram(self, request):
+        """Runtime or memory distribution of a problem's accepted submissions"""
+        try:
+            problem_id = int(request.query_params['problem_id'])
+            language_id = int(request.query_params['language_id'])
+        except (KeyError, ValueError):
+            return Response({'error': 'problem_id and language_id are required integers'}, status=400)
+        metric = request.query_params.get('metric', 'time')
+        if metric not in PERFORMANCE_METRICS:
+            return Response({'error': 'metric must be time or memory'}, status=400)
+
+        return Response({
+            'problem_id': problem_id,
+            'language_id': language_id,
+            'metric': metric,
+            **histogram(problem_id, language_id, metric)
+        })
+
+    @action(detail=True, methods=['get'])
+    def performance(self, request, pk=None):
+        """Where an accepted submission ranks for runtime and memory"""
+        submission = self.get_object()
+        data = {
+            'submission_id': submission.id,
+            'status': submission.status,
+            'time_ms': metric_value('time', time=submission.time),
+            'memory_kb': metric_value('memory', memory=submission.memory),
+        }
+        for metric in PERFORMANCE_METRICS:
+            value = metric_value(metric, submission.time, submission.memory)
+            data[f'{metric}_beats_percent'] = (
+                percentile_rank(submission.problem_id, submission.language_id, metric, value)
+                if submission.status == 'Accepted' and value is not None else None
+            )
+        return Response(data)
+
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """Stream a contest's filtered submissions as CSV or Parquet"""
+        contest_id = request.query_params.get('contest_id')
+        if not contest_id:
+            return Response({'error': 'contest_id is required'}, status=400)
+
+        # Not "format": DRF reserves that query parameter for renderer selection
+        export_format = request.query_params.get('export_format', 'csv')
+        if export_format == 'csv':
+            response = StreamingHttpResponse(stream_csv(self.get_queryset()), content_type='text/csv')
+        elif export_format == 'parquet':
+            if not parquet_available():
+                return Response({'error': 'Parquet export requires pyarrow'}, status=400)
+            response = StreamingHttpResponse(
+                stream_parquet(self.get_queryset()),
+                content_type='application/vnd.apache.parquet'
+            )
+        else:
+            return Response({'error': 'export_format must be csv or parquet'}, status=400)
+
+        response['Content-Disposition'] = (
+            f'attachment; filename="contest-{contest_id}-submissions.{export_format}"'
+        )
+        return response
+
+
+class TelemetryIngestView(generics.GenericAPIView):
+    """Receive a client-side batch of activity events for a problem session"""
+    serializer_class = TelemetryBatchSerializer
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, problem_id):
+        problem = get_object_or_404(Problem, id=problem_id)
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        activity = ingest_events(
+            request.user,
+            problem,
+            serializer.validated_data['session_id'],
+            serializer.validated_data['events'],
+            serializer.validated_data['time_spent']
+        )
+        return Response({
+            'activity_id': activity.id,
+            'received': len(serializer.validated_data['events'])
+        }, status=status.HTTP_201_CREATED)
+
+
+class CodeHistoryView(generics.GenericAPIView):
+    """
+    Code history of a coding session: the list of recorded changes, or with
+    ``at`` (ISO datetime) the code as it was at that moment
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, activity_id):
+        activity = get_object_or_404(UserActivity, id=activity_id)
+        at = request.query_params.get('at')
+        if not at:
+            changes = activity.code_snapshots.order_by('sequence').values(
+                'sequence', 'taken_at', 'is_keyframe', 'code_length'
+            )
+            return Response({'activity_id': activity.id, 'changes': list(changes)})
+
+        moment = parse_datetime(at)
+        if moment is None:
+            return Response({'error': 'at must be an ISO 8601 datetime'}, status=status.HTTP_400_BAD_REQUEST)
+        if timezone.is_naive(moment):
+            moment = timezone.make_aware(moment)
+
+        code, snapshot = code_at(activity, moment)
+        return Response({
+            'activity_id': activity.id,
+            'at': moment,
+            'code': code,
+            'code_length': len(code),
+            'sequence': snapshot.sequence if snapshot else None,
+            'changed_at': snapshot.taken_at if snapshot else None
+        })
+
+
+class UserActivityPagination(CursorPagination):
+    """Keyset pagination over coding sessions, newest first"""
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+    ordering = ('-started_at', '-id')
 
 
 class UserActivityViewSet(viewsets.ReadOnlyModelViewSet):
     """ViewSet for monitoring user activities during contests"""
     serializer_class = UserActivitySerializer
     permission_classes = [IsAdminUser]
-    
+    pagination_class = UserActivityPagination
+
+    def get_serializer_class(self):
+        # The JSON histories only load on detail
+        if self.action == 'list':
+            return UserActivityListSerializer
+        return UserActivitySerializer
+
     def get_queryset(self):
-        queryset = UserActivity.objects.select_related('user', 'submission', 'submission__problem').all()
+        queryset = UserActivity.objects.select_related('user', 'problem', 'problem__contest')
+        if self.action == 'list':
+            queryset = queryset.defer(*ACTIVITY_JSON_FIELDS)
         
         # Filter by contest if specified
+        # (through the contest's problem ids, so the page is read off the
+        # started_at index instead of sorting every session of the contest)
         contest_id = self.request.query_params.get('contest_id')
         if contest_id:
-            queryset = queryset.filter(submission__problem__contest_id=contest_id)
+            queryset = queryset.filter(problem__in=Problem.objects.filter(contest_id=contest_id).values('id'))
+
+        # Filter by problem if specified
+        problem_id = self.request.query_params.get('problem_id')
+        if problem_id:
+            queryset = queryset.filter(problem_id=problem_id)
             
         # Filter by user if specified
         user_id = self.request.query_params.get('user_id')
         if user_id:
             queryset = queryset.filter(user_id=user_id)
             
-        return queryset.order_by('-started_at')
+        return queryset.order_by('-started_at', '-id')
 
 
 class PlagiarismCheckViewSet(viewsets.ModelViewSet):
@@ -1282,8 +1654,27 @@ class PlagiarismCheckViewSet(viewsets.ModelViewSet):
                 {'message': 'Not enough submissions to check for plagiarism'}, 
                 status=status.HTTP_200_OK
             )
-        
-        checks_created = 0
+
+        # Only keep pairs at or above this similarity percentage
+        try:
+            threshold = float(request.data.get('threshold', 0))
+        except (TypeError, ValueError):
+            return Response(
+                {'error': 'threshold must be a number'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        # Fingerprints (including AST subtree hashes) are computed once per
+        # submission and reused for every pair it takes part in
+        fingerprints = {submission.id: index_submission(submission) for submission in submissions}
+
+        submission_ids = list(fingerprints)
+        already_checked = set(PlagiarismCheck.objects.filter(
+            submission1_id__in=submission_ids,
+            submission2_id__in=submission_ids
+        ).values_list('submission1_id', 'submission2_id'))
+
+        new_checks = []
         
         # Compare each pair of submissions
         for i in range(len(submissions)):
@@ -1296,31 +1687,88 @@ class PlagiarismCheckViewSet(viewsets.ModelViewSet):
                 #     continue
                 
                 # Skip if already checked
-                if PlagiarismCheck.objects.filter(
-                    submission1=submission1, 
-                    submission2=submission2
-                ).exists():
+                if (submission1.id, submission2.id) in already_checked:
                     continue
                 
                 # Calculate similarity
-                similarity = self._calculate_code_similarity(
-                    submission1.code, 
-                    submission2.code
+                algorithm, similarity = compare_submissions(
+                    submission1, fingerprints[submission1.id],
+                    submission2, fingerprints[submission2.id]
                 )
+                similarity = round(similarity * 100, 1)
+                if similarity < threshold:
+                    continue
                 
-                # Create plagiarism check record
-                PlagiarismCheck.objects.create(
+                new_checks.append(PlagiarismCheck(
                     submission1=submission1,
                     submission2=submission2,
-                    similarity_score=similarity
-                )
-                checks_created += 1
+                    similarity_score=similarity,
+                    algorithm_used=algorithm
+                ))
+
+        PlagiarismCheck.objects.bulk_create(new_checks, batch_size=500)
+        checks_created = len(new_checks)
         
         return Response({
             'message': f'Plagiarism detection completed. {checks_created} comparisons made.',
             'checks_created': checks_created
         })
     
+    @action(detail=False, methods=['get', 'post'], url_path='archive-search')
+    def archive_search(self, request):
+        """Find near-duplicates of a submission or code snippet across all past contests"""
+        params = request.data if request.method == 'POST' else request.query_params
+        submission_id = params.get('submission_id')
+        source_code = params.get('source_code')
+
+        try:
+            threshold = float(params.get('threshold', 0.5))
+            limit = int(params.get('limit', 50))
+        except (TypeError, ValueError):
+            return Response(
+                {'error': 'threshold and limit must be numbers'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        if submission_id:
+            submission = get_object_or_404(Submission, id=submission_id)
+            # Only POST indexes the submission; GET must not write
+            if request.method == 'POST' and submission.status == 'Accepted':
+                signature = index_submission(submission).minhash
+            else:
+                signature = submission_signature(submission)
+        elif source_code:
+            signature = minhash_signature(source_code)
+        else:
+            return Response(
+                {'error': 'Either submission_id or source_code must be provided'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        matches = find_near_duplicates(
+            signature,
+            threshold=threshold,
+            limit=limit,
+            exclude_submission_id=submission_id
+        )
+
+        return Response({
+            'threshold': threshold,
+            'matches': [
+                {
+                    'submission_id': match.id,
+                    'username': match.user.username,
+                    'problem_id': match.problem_id,
+                    'problem_title': match.problem.title,
+                    'contest_id': match.problem.contest_id,
+                    'contest_title': match.problem.contest.title,
+                    'submitted_at': match.submitted_at,
+                    'estimated_similarity': round(similarity, 3)
+                }
+                for similarity, match in matches
+            ]
+        })
+
     @action(detail=True, methods=['patch'])
     def mark_reviewed(self, request, pk=None):
         """Mark a plagiarism check as reviewed"""
@@ -1338,24 +1786,111 @@ class PlagiarismCheckViewSet(viewsets.ModelViewSet):
                 {'error': 'Plagiarism check not found'}, 
                 status=status.HTTP_404_NOT_FOUND
             )
-    
-    def _calculate_code_similarity(self, code1, code2):
-        """Calculate similarity between two code snippets"""
-        import difflib
-        
-        # Normalize code by removing whitespace and comments
-        def normalize_code(code):
-            lines = code.strip().split('\n')
-            normalized = []
-            for line in lines:
-                line = line.strip()
-                if line and not line.startswith('#') and not line.startswith('//'):
-                    normalized.append(line)
-            return '\n'.join(normalized)
-        
-        normalized_code1 = normalize_code(code1)
-        normalized_code2 = normalize_code(code2)
-        
-        # Calculate similarity using difflib
-        similarity = difflib.SequenceMatcher(None, normalized_code1, normalized_code2).ratio()
-        return round(similarity, 3)
\ No newline at end of file
+
+
+class PlagiarismClusterViewSet(viewsets.ReadOnlyModelViewSet):
+    """Report of plagiarism clusters (groups of linked submissions) per contest"""
+    serializer_class = PlagiarismClusterSerializer
+    permission_classes = [IsAdminUser]
+
+    def get_queryset(self):
+        queryset = PlagiarismCluster.objects.prefetch_related(
+            Prefetch(
+                'members',
+                queryset=PlagiarismClusterMember.objects.select_related('user', 'submission__problem')
+            )
+        )
+
+        # Filter by contest if specified
+        contest_id = self.request.query_params.get('contest_id')
+        if contest_id:
+            queryset = queryset.filter(contest_id=contest_id)
+
+        # Only show clusters of at least this size
+        min_size = self.request.query_params.get('min_size')
+        if min_size:
+            queryset = queryset.filter(size__gte=min_size)
+
+        return queryset.order_by('-max_similarity', '-size')
+
+    @action(detail=False, methods=['post'])
+    def build(self, request):
+        """Rebuild the clusters of a contest from its plagiarism checks"""
+        contest_id = request.data.get('contest_id')
+        if not contest_id:
+            return Response(
+                {'error': 'contest_id is required'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        contest = get_object_or_404(Contest, id=contest_id)
+
+        try:
+            threshold = float(request.data.get('threshold', 70))
+        except (TypeError, ValueError):
+            return Response(
+                {'error': 'threshold must be a number'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        clusters = build_clusters(contest, threshold)
+        return Response({
+            'message': f'Built {len(clusters)} plagiarism clusters.',
+            'clusters_created': len(clusters),
+            'threshold': threshold
+        })
+
+
+class CollusionGroupViewSet(viewsets.ReadOnlyModelViewSet):
+    """Groups of users linked by shared IP addresses, sessions or devices, most suspicious first"""
+    serializer_class = CollusionGroupSerializer
+    permission_classes = [IsAdminUser]
+
+    def get_queryset(self):
+        queryset = CollusionGroup.objects.prefetch_related(
+            Prefetch('members', queryset=CollusionGroupMember.objects.select_related('user'))
+        )
+
+        # Filter by contest if specified
+        contest_id = self.request.query_params.get('contest_id')
+        if contest_id:
+            queryset = queryset.filter(contest_id=contest_id)
+
+        # Only show groups of at least this size
+        min_size = self.request.query_params.get('min_size')
+        if min_size:
+            queryset = queryset.filter(size__gte=min_size)
+
+        return queryset.order_by('-score', '-size')
+
+    @action(detail=False, methods=['post'])
+    def build(self, request):
+        """Rebuild the collusion groups of a contest from its submissions"""
+        contest_id = request.data.get('contest_id')
+        if not contest_id:
+            return Response(
+                {'error': 'contest_id is required'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        contest = get_object_or_404(Contest, id=contest_id)
+
+        try:
+            window_minutes = int(request.data.get('window_minutes', WINDOW_MINUTES))
+            max_users = int(request.data.get('max_users_per_identifier', MAX_USERS_PER_IDENTIFIER))
+        except (TypeError, ValueError):
+            return Response(
+                {'error': 'window_minutes and max_users_per_identifier must be integers'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if window_minutes < 1 or max_users < 2:
+            return Response(
+                {'error': 'window_minutes must be at least 1 and max_users_per_identifier at least 2'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        groups = build_collusion_groups(contest, window_minutes, max_users)
+        return Response({
+            'message': f'Built {len(groups)} collusion groups.',
+            'groups_created': len(groups),
+            'window_minutes': window_minutes,
+            'max_users_per_identifier': max_users
+        })
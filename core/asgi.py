@@ -3,14 +3,31 @@ ASGI config for core project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Proctoring streams (Server-Sent Events) are served by ``contest.realtime``
+directly on the ASGI app; every other request goes to Django.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
 
 import os
+import re
 
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+from contest.realtime import proctoring_stream  # noqa: E402  (needs the app registry)
+
+PROCTORING_STREAM_PATH = re.compile(r'^/api/proctoring/contests/(?P<contest_id>\d+)/stream/?$')
+
+
+async def application(scope, receive, send):
+    if scope['type'] == 'http':
+        match = PROCTORING_STREAM_PATH.match(scope['path'])
+        if match:
+            await proctoring_stream(scope, receive, send, int(match.group('contest_id')))
+            return
+    await django_application(scope, receive, send)
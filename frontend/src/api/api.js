@@ -46,6 +46,17 @@ export const getSubmissionAnalytics = async (params) => {
   }
 };
 
+// Fetch one submission with its full source code, output and user agent
+export const getSubmissionAnalyticsDetail = async (submissionId) => {
+  try {
+    const response = await api.get(`/analytics/submissions/${submissionId}/`);
+    return response.data;
+  } catch (error) {
+    console.error('Error fetching submission details:', error);
+    throw error;
+  }
+};
+
 // ------------------- Contest related endpoints -------------------
 
 export const getContestList = async () => {
@@ -35,7 +35,7 @@ import ErrorIcon from '@mui/icons-material/Error';
 import WarningIcon from '@mui/icons-material/Warning';
 import TimerIcon from '@mui/icons-material/Timer';
 import CloseIcon from '@mui/icons-material/Close';
-import { getSubmissionAnalytics } from '../api/api';
+import { getSubmissionAnalytics, getSubmissionAnalyticsDetail } from '../api/api';
 
 const ORANGE = '#FFA116';
 
@@ -98,9 +98,16 @@ export default function SubmissionAnalytics({ contestId }) {
     fetchData();
   }, [contestId, filterStatus, filterUser]);
 
-  const handleViewCode = (submission) => {
+  const handleViewCode = async (submission) => {
+    // The list rows are compact; source code and user agent come from the detail endpoint
     setSelectedSubmission(submission);
     setCodeViewDialog(true);
+    try {
+      const details = await getSubmissionAnalyticsDetail(submission.id);
+      setSelectedSubmission((current) => (current?.id === submission.id ? details : current));
+    } catch (error) {
+      setError(error.message);
+    }
   };
 
   const handleCloseDialog = () => {
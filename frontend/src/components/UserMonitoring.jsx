@@ -49,7 +49,7 @@ export default function UserMonitoring({ contestId }) {
     try {
       setLoading(true);
       const response = await getUserSubmissionSummary(contestId);
-      setUsers(response.data);
+      setUsers(response.data.results || response.data);
     } catch (error) {
       console.error('Error fetching user data:', error);
     } finally {